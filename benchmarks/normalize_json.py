@@ -0,0 +1,35 @@
+"""
+Compare the json.dumps/json.loads round trip against to_native.
+
+Usage:
+    python benchmarks/normalize_json.py
+"""
+
+import json
+
+import numpy as np
+
+from fns.json_encoders import NpEncoder, to_native
+from fns.metrics import benchmark_function
+
+
+def main(size: int = 2_000_000):
+    rng = np.random.default_rng(0)
+    payload = {
+        "embedding": rng.random(size),
+        "ids": rng.integers(0, 1_000_000, size),
+        "metadata": [
+            {"id": np.int64(i), "score": np.float32(i / 7)} for i in range(10_000)
+        ],
+    }
+    round_trip = benchmark_function(
+        lambda: json.loads(json.dumps(payload, cls=NpEncoder)), repeat=3
+    )["mean"]
+    direct = benchmark_function(lambda: to_native(payload), repeat=3)["mean"]
+    print(f"{size:,} floats and ints, 10,000 records")
+    print(f"round trip: {round_trip * 1000:8.1f} ms")
+    print(f" to_native: {direct * 1000:8.1f} ms, {round_trip / direct:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compare the regex path of `span_positions` against `PhraseMatcher`.
+
+Usage:
+    python benchmarks/phrase_matching.py
+"""
+
+import random
+import string
+import time
+
+from fns.text import PhraseMatcher, span_positions
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+
+
+def main(num_phrases: int = 50_000, num_texts: int = 200):
+    rng = random.Random(0)
+    phrases = [
+        " ".join(random_word(rng) for _ in range(rng.randint(1, 3)))
+        for _ in range(num_phrases)
+    ]
+    texts = [
+        " ".join(
+            rng.choice(phrases) if rng.random() < 0.1 else random_word(rng)
+            for _ in range(50)
+        )
+        for _ in range(num_texts)
+    ]
+
+    start = time.perf_counter()
+    matcher = PhraseMatcher(phrases)
+    print(f"PhraseMatcher build: {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    expected = [span_positions(text, phrases) for text in texts]
+    regex_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    spans = matcher.find_all(texts)
+    matcher_time = time.perf_counter() - start
+
+    # The regex prefers the first listed alternative while PhraseMatcher
+    # prefers the longest phrase, so spans can differ when phrases overlap.
+    print(f"{num_phrases:,} phrases, {num_texts} texts")
+    print(
+        f"  spans found: regex {sum(map(len, expected))}, matcher {sum(map(len, spans))}"
+    )
+    print(f"  regex:         {num_texts / regex_time:10,.0f} texts/s")
+    print(f"  PhraseMatcher: {num_texts / matcher_time:10,.0f} texts/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compare chained cleaners against a fused TextPipeline.
+
+Usage:
+    python benchmarks/preprocessing.py
+"""
+
+import pandas as pd
+
+from fns.metrics import benchmark_function
+from fns.preprocessing import (
+    compose,
+    remove_hashtag,
+    remove_hyperlink,
+    remove_multiple_commas,
+    remove_multiple_space,
+    remove_punctuation,
+    remove_retweet,
+)
+
+
+def main(num_texts: int = 200_000):
+    tweets = [
+        "RT @user: #Python   is great,, really https://t.co/abc",
+        "Loving the #weather today!!!   #sunny",
+        "Check this out,,, https://example.com/page?id=1",
+    ]
+    texts = pd.Series(tweets * (num_texts // len(tweets)))
+    steps = [
+        remove_retweet,
+        remove_hyperlink,
+        remove_hashtag,
+        remove_punctuation,
+        remove_multiple_commas,
+        remove_multiple_space,
+    ]
+
+    def chained():
+        result = texts
+        for step in steps:
+            result = result.apply(step)
+        return result
+
+    pipeline = compose(*steps)
+    chained_seconds = benchmark_function(chained, repeat=3)["mean"]
+    fused_seconds = benchmark_function(lambda: pipeline.apply(texts), repeat=3)["mean"]
+    print(f"{len(texts):,} texts")
+    print(f"chained apply: {chained_seconds * 1000:8.1f} ms")
+    print(
+        f"     pipeline: {fused_seconds * 1000:8.1f} ms,"
+        f" {chained_seconds / fused_seconds:4.1f}x"
+    )
+    print(pipeline.report())
+
+
+if __name__ == "__main__":
+    main()
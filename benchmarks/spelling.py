@@ -0,0 +1,60 @@
+"""
+Compare spelling correction with `generate_edits` against the `SymSpell` index.
+
+Usage:
+    python benchmarks/spelling.py
+"""
+
+import random
+import string
+import time
+
+from fns import generate_edits
+from fns.lexicon import dict_words
+from fns.metrics import benchmark_function
+from fns.spelling import SymSpell
+
+
+def load_vocabulary(size: int = 100_000):
+    try:
+        return [w.lower() for w in dict_words() if w.isalpha()]
+    except FileNotFoundError:
+        rng = random.Random(0)
+        return [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+            for _ in range(size)
+        ]
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    i = rng.randrange(len(word))
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1 :]
+
+
+def main():
+    vocabulary = load_vocabulary()
+    vocabulary_set = set(vocabulary)
+    rng = random.Random(0)
+    queries = [misspell(w, rng) for w in rng.sample(vocabulary, 20)]
+
+    start = time.perf_counter()
+    speller = SymSpell(max_distance=2).fit(vocabulary)
+    print(f"Index build: {time.perf_counter() - start:.2f}s for {len(speller)} words")
+
+    def with_edits():
+        for query in queries:
+            candidates = vocabulary_set.intersection(generate_edits(query, n=2))
+            min(candidates, default=query)
+
+    def with_symspell():
+        for query in queries:
+            speller.lookup(query, n=1)
+
+    for name, fn in [("generate_edits", with_edits), ("SymSpell", with_symspell)]:
+        result = benchmark_function(fn, repeat=3)
+        per_query = result["mean"] / len(queries) * 1e6
+        print(f"{name:>15}: {per_query:,.0f} µs per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Compare `Series.apply` against the batch text statistics.
+
+Usage:
+    python benchmarks/text_stats.py
+"""
+
+import numpy as np
+import pandas as pd
+
+from fns.metrics import benchmark_function
+from fns.text import (
+    abbreviations_batch,
+    extract_abbreviations,
+    is_non_ascii,
+    is_non_ascii_batch,
+    num_words,
+    num_words_batch,
+)
+
+
+def main(num_texts: int = 1_000_000):
+    rng = np.random.default_rng(0)
+    words = np.array(["the", "NASA", "café", "report", "HTTP", "data", "of"])
+    lengths = rng.integers(1, 30, num_texts)
+    texts = pd.Series(
+        [" ".join(rng.choice(words, n)) for n in lengths[: num_texts // 100]] * 100
+    )
+    cases = {
+        "num_words": (
+            lambda: texts.apply(num_words),
+            lambda: num_words_batch(texts),
+        ),
+        "is_non_ascii": (
+            lambda: texts.apply(is_non_ascii),
+            lambda: is_non_ascii_batch(texts),
+        ),
+        "abbreviations": (
+            lambda: texts.apply(lambda text: extract_abbreviations([text])),
+            lambda: abbreviations_batch(texts),
+        ),
+    }
+    print(f"{len(texts):,} texts")
+    for name, (with_apply, with_batch) in cases.items():
+        apply_seconds = benchmark_function(with_apply, repeat=3)["mean"]
+        batch_seconds = benchmark_function(with_batch, repeat=3)["mean"]
+        print(
+            f"{name:>14}: apply {apply_seconds * 1000:8.1f} ms,"
+            f" batch {batch_seconds * 1000:8.1f} ms,"
+            f" {apply_seconds / batch_seconds:4.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Compare list slicing against strided array views for n-grams and windows.
+
+Usage:
+    python benchmarks/windowing.py
+"""
+
+import tracemalloc
+
+import numpy as np
+
+from fns import ngrams
+from fns.metrics import benchmark_function
+from fns.text import offset_by_one, window
+
+
+def peak_memory(fn) -> float:
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak / 1e6
+
+
+def main(num_tokens: int = 1_000_000, size: int = 8):
+    array = np.random.default_rng(0).integers(0, 50_000, num_tokens, dtype=np.int32)
+    tokens = array.tolist()
+    cases = {
+        "ngrams": (lambda: ngrams(tokens, size), lambda: ngrams(array, size)),
+        "window": (lambda: window(tokens, size), lambda: window(array, size)),
+        "offset_by_one": (
+            lambda: offset_by_one(tokens, size),
+            lambda: offset_by_one(array, size),
+        ),
+    }
+    print(f"{num_tokens:,} tokens, size {size}")
+    for name, (with_list, with_array) in cases.items():
+        for kind, fn in [("list", with_list), ("array", with_array)]:
+            seconds = benchmark_function(fn, repeat=3)["mean"]
+            print(
+                f"{name:>14} {kind:>5}: {seconds * 1000:9.2f} ms,"
+                f" {peak_memory(fn):9.2f} MB peak"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+import functools
+import hashlib
+import pickle
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+_missing = object()
+
+
+def _close_connection(connection: sqlite3.Connection) -> None:
+    connection.commit()
+    connection.close()
+
+
+def content_key(text: Union[str, bytes], *args, **kwargs) -> bytes:
+    """
+    Hash an input into a 16-byte cache key with BLAKE2b.
+
+    Extra arguments are pickled into the key, so calls with different
+    options do not collide.
+
+    Args:
+        text: Input string or bytes
+        args: Other positional arguments of the call
+        kwargs: Other keyword arguments of the call
+
+    Returns:
+        Digest bytes
+    """
+    data = text.encode("utf-8", "surrogatepass") if isinstance(text, str) else text
+    digest = hashlib.blake2b(data, digest_size=16)
+    if args or kwargs:
+        digest.update(pickle.dumps((args, sorted(kwargs.items())), protocol=4))
+    return digest.digest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of results keyed by content hash.
+
+    Recent results are kept in an in-memory LRU of at most `maxsize` entries.
+    If `path` is given, every result is also written to a SQLite file, so it
+    survives across runs and can be larger than memory. Writes are committed
+    every `commit_every` entries, on `flush` or `close`, and at interpreter
+    exit.
+
+    Usage:
+    ```python
+    >>> cache = ResultCache(maxsize=10_000, path="cleaned.sqlite")
+    >>> key = content_key("RT hello")
+    >>> cache.get(key) is None
+    True
+    >>> cache.set(key, "hello")
+    >>> cache.get(key)
+    'hello'
+    >>> cache.stats()
+    {'hits': 1, 'disk_hits': 0, 'misses': 1, 'hit_rate': 0.5, 'size': 1}
+    >>> cache.close()
+    ```
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 100_000,
+        path: Union[str, Path, None] = None,
+        namespace: str = "default",
+        commit_every: int = 10_000,
+    ):
+        """
+        Args:
+            maxsize: Maximum number of entries kept in memory
+            path: SQLite file for the on-disk tier. Memory only if None.
+            namespace: Name separating results of different functions in
+                the same file
+            commit_every: Number of disk writes between commits
+        """
+        self.maxsize = maxsize
+        self.namespace = namespace
+        self.commit_every = commit_every
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[bytes, Any]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._uncommitted = 0
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT, key BLOB, value BLOB, PRIMARY KEY (namespace, key))"
+            )
+            # Commit pending writes when the cache is garbage collected or
+            # the interpreter exits, even if `close` is never called.
+            self._finalizer = weakref.finalize(self, _close_connection, self._db)
+
+    def _remember(self, key: bytes, value: Any) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def get(self, key: bytes, default: Any = None) -> Any:
+        """
+        Get a cached result.
+
+        Args:
+            key: Key from `content_key`
+            default: Value returned on a miss
+
+        Returns:
+            Cached result or `default`
+        """
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys: Iterable[bytes]) -> Dict[bytes, Any]:
+        """
+        Get the cached results of many keys, reading the disk tier once.
+
+        Args:
+            keys: Keys from `content_key`
+
+        Returns:
+            Dictionary of key to result for the keys found
+        """
+        found, on_disk = {}, []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                value = self._memory.get(key, _missing)
+                if value is _missing:
+                    on_disk.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = value
+            self.hits += len(found)
+            disk_hits = 0
+            if self._db is not None and on_disk:
+                for key, value in self._select(on_disk):
+                    found[key] = pickle.loads(value)
+                    self._remember(key, found[key])
+                    disk_hits += 1
+            self.disk_hits += disk_hits
+            self.misses += len(on_disk) - disk_hits
+        return found
+
+    def _select(self, keys: List[bytes]) -> List[Tuple[bytes, bytes]]:
+        rows = []
+        # SQLite limits the number of parameters of a single statement
+        for start in range(0, len(keys), 900):
+            chunk = keys[start : start + 900]
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(
+                self._db.execute(
+                    "SELECT key, value FROM cache "
+                    f"WHERE namespace = ? AND key IN ({placeholders})",
+                    [self.namespace, *chunk],
+                )
+            )
+        return rows
+
+    def set(self, key: bytes, value: Any) -> None:
+        """
+        Cache a result.
+
+        Args:
+            key: Key from `content_key`
+            value: Picklable result
+
+        Returns:
+            None
+        """
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[bytes, Any]) -> None:
+        """
+        Cache many results, writing the disk tier in one statement.
+
+        Args:
+            items: Dictionary of key to picklable result
+
+        Returns:
+            None
+        """
+        with self._lock:
+            for key, value in items.items():
+                self._remember(key, value)
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?)",
+                    [
+                        (self.namespace, key, pickle.dumps(value, protocol=4))
+                        for key, value in items.items()
+                    ],
+                )
+                self._uncommitted += len(items)
+                if self._uncommitted >= self.commit_every:
+                    self.flush()
+
+    def flush(self) -> None:
+        """
+        Commit pending writes of the disk tier.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+            self._uncommitted = 0
+
+    def close(self) -> None:
+        """
+        Commit pending writes and close the disk tier.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._finalizer()
+                self._db = None
+
+    def clear(self) -> None:
+        """
+        Remove all entries of this namespace from memory and disk and reset
+        the statistics.
+        """
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute(
+                    "DELETE FROM cache WHERE namespace = ?", [self.namespace]
+                )
+                self.flush()
+            self.hits = self.disk_hits = self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Fraction of lookups answered by either tier.
+        """
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Get hit and miss counts of the cache.
+
+        Returns:
+            Dictionary with memory hits, disk hits, misses, hit rate and the
+            number of entries in memory
+        """
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "size": len(self._memory),
+        }
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def cached(
+    func: Optional[Callable] = None,
+    *,
+    maxsize: int = 100_000,
+    path: Union[str, Path, None] = None,
+    cache: Optional[ResultCache] = None,
+) -> Callable:
+    """
+    Decorator to cache results of a function by the content of its first
+    argument.
+
+    The cache is available as `func.cache`, e.g. to check `func.cache.stats()`.
+
+    Usage:
+    ```python
+    @cached(path="clean.sqlite")
+    def clean(text):
+        return remove_hyperlink(remove_retweet(text))
+
+    df["clean"] = df["tweet"].apply(clean)
+    print(clean.cache.stats())
+    clean.cache.close()
+    ```
+
+    Args:
+        func: Function taking a string (or bytes) as first argument
+        maxsize: Maximum number of results kept in memory
+        path: SQLite file for the on-disk tier
+        cache: Existing cache to use instead of creating one
+
+    Returns:
+        Decorated function
+    """
+    if func is None:
+        return functools.partial(cached, maxsize=maxsize, path=path, cache=cache)
+    if cache is None:
+        namespace = f"{func.__module__}.{func.__qualname__}"
+        cache = ResultCache(maxsize=maxsize, path=path, namespace=namespace)
+
+    @functools.wraps(func)
+    def inner(text, *args, **kwargs):
+        key = content_key(text, *args, **kwargs)
+        result = cache.get(key, _missing)
+        if result is _missing:
+            result = func(text, *args, **kwargs)
+            cache.set(key, result)
+        return result
+
+    inner.cache = cache
+    return inner
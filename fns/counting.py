@@ -0,0 +1,363 @@
+import heapq
+import itertools
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+class SpaceSaving:
+    """
+    Approximate counter for the most frequent items of an unbounded stream.
+
+    At most `capacity` items are tracked, so memory does not grow with the
+    number of distinct items. Every estimated count over-estimates the true
+    count by at most its error, and any item occurring more than
+    `total / capacity` times is guaranteed to be tracked.
+
+    Reference: Metwally et al., "Efficient Computation of Frequent and Top-k
+    Elements in Data Streams" (2005)
+
+    Usage:
+    ```python
+    >>> counter = SpaceSaving(capacity=1000)
+    >>> counter.update(["a", "b", "a"])
+    >>> counter.most_common(1)
+    [('a', 2)]
+    ```
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Args:
+            capacity: Maximum number of items to track
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+        self.total = 0
+        # Exactly one (count, order, item) entry per tracked item. Counts in
+        # the heap may lag behind `counts` and are refreshed on eviction.
+        self._heap: List[Tuple[int, int, Hashable]] = []
+        self._order = itertools.count()
+
+    def _push(self, item: Hashable) -> None:
+        heapq.heappush(self._heap, (self.counts[item], next(self._order), item))
+
+    def _pop_min(self) -> Tuple[Hashable, int]:
+        while True:
+            count, _, item = heapq.heappop(self._heap)
+            if self.counts[item] == count:
+                return item, count
+            self._push(item)
+
+    def _min_count(self) -> int:
+        if len(self.counts) < self.capacity:
+            return 0
+        item, count = self._pop_min()
+        self._push(item)
+        return count
+
+    def add(self, item: Hashable, count: int = 1) -> None:
+        """
+        Count an item.
+
+        Args:
+            item: Hashable item
+            count: Number of occurrences to add
+
+        Returns:
+            None
+        """
+        self.total += count
+        if item in self.counts:
+            self.counts[item] += count
+            return
+        error = 0
+        if len(self.counts) >= self.capacity:
+            evicted, error = self._pop_min()
+            del self.counts[evicted]
+            del self.errors[evicted]
+        self.counts[item] = error + count
+        self.errors[item] = error
+        self._push(item)
+
+    def update(self, items: Iterable[Hashable]) -> None:
+        """
+        Count every item of an iterable.
+
+        Args:
+            items: Iterable of hashable items
+
+        Returns:
+            None
+        """
+        for item in items:
+            self.add(item)
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """
+        Combine the counts of another counter into this one.
+
+        Useful to combine counters built on separate processes or shards.
+
+        Reference: Agarwal et al., "Mergeable Summaries" (2012)
+
+        Args:
+            other: Another SpaceSaving counter
+
+        Returns:
+            This counter
+        """
+        self_min, other_min = self._min_count(), other._min_count()
+        counts, errors = {}, {}
+        for item in set(self.counts) | set(other.counts):
+            counts[item] = self.counts.get(item, self_min) + other.counts.get(
+                item, other_min
+            )
+            errors[item] = self.errors.get(item, self_min) + other.errors.get(
+                item, other_min
+            )
+        kept = heapq.nlargest(self.capacity, counts, key=counts.__getitem__)
+        self.counts = {item: counts[item] for item in kept}
+        self.errors = {item: errors[item] for item in kept}
+        self.total += other.total
+        self._heap = []
+        for item in kept:
+            self._push(item)
+        return self
+
+    def most_common(
+        self, n: Optional[int] = None, errors: bool = False
+    ) -> List[Tuple[Any, ...]]:
+        """
+        Get the items with the highest estimated counts.
+
+        Args:
+            n: Number of items. Defaults to all tracked items.
+            errors: Also return the maximum over-estimation of each count
+
+        Returns:
+            List of (item, count) or (item, count, error) tuples
+        """
+        n = len(self.counts) if n is None else n
+        items = heapq.nlargest(n, self.counts, key=self.counts.__getitem__)
+        if errors:
+            return [(item, self.counts[item], self.errors[item]) for item in items]
+        return [(item, self.counts[item]) for item in items]
+
+    def __getitem__(self, item: Hashable) -> int:
+        return self.counts.get(item, 0)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self.counts
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+class CompactCounter:
+    """
+    Exact counter storing keys in a `pd.Index` and counts in a NumPy array.
+
+    Unlike `dict` or `Counter`, no Python object is created per count, which
+    makes it much smaller for vocabularies with millions of keys. Bulk
+    updates from NumPy arrays and top-k queries are vectorized.
+
+    Usage:
+    ```python
+    >>> counter = CompactCounter(np.array(["a", "b", "a"]))
+    >>> counter.most_common(1)
+    [('a', 2)]
+    >>> counter.percent()["a"]
+    66.66666666666667
+    ```
+    """
+
+    def __init__(
+        self, items: Union[np.ndarray, Mapping, Iterable, None] = None, dtype=np.int64
+    ):
+        """
+        Args:
+            items: Initial tokens or mapping of key to count
+            dtype: NumPy dtype of the counts
+        """
+        self._index = pd.Index([])
+        # Keys added since the index was last rebuilt, mapped to their ids
+        self._pending: Dict[Hashable, int] = {}
+        self._counts = np.zeros(1024, dtype=dtype)
+        if items is not None:
+            self.update(items)
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._index = self._index.append(pd.Index(list(self._pending)))
+            self._pending = {}
+
+    def _ids(self, keys: np.ndarray) -> np.ndarray:
+        ids = self._index.get_indexer(keys)
+        missing = np.flatnonzero(ids == -1)
+        if len(missing) >= 10_000:
+            # Many new keys: add them to the index in one vectorized step.
+            if self._pending:
+                self._flush()
+                ids = self._index.get_indexer(keys)
+                missing = np.flatnonzero(ids == -1)
+            ids[missing] = np.arange(len(self), len(self) + len(missing))
+            new_keys = pd.Index(keys[missing])
+            self._index = self._index.append(new_keys) if len(self._index) else new_keys
+        else:
+            for i in missing:
+                key = keys[i].item() if isinstance(keys[i], np.generic) else keys[i]
+                if key not in self._pending:
+                    self._pending[key] = len(self)
+                ids[i] = self._pending[key]
+
+        if len(self) > len(self._counts):
+            counts = np.zeros(max(2 * len(self._counts), len(self)), self._counts.dtype)
+            counts[: len(self._counts)] = self._counts
+            self._counts = counts
+        # Rebuilding the index is linear, so only do it once pending keys
+        # make up a sizable fraction of it.
+        if len(self._pending) > max(len(self._index) // 4, 100_000):
+            self._flush()
+        return ids
+
+    def update(self, items: Union[np.ndarray, Mapping, Iterable]) -> None:
+        """
+        Count tokens or add counts from a mapping.
+
+        Args:
+            items: NumPy array of tokens, iterable of tokens or mapping of
+                key to count
+
+        Returns:
+            None
+        """
+        if isinstance(items, np.ndarray):
+            keys, counts = np.unique(items, return_counts=True)
+        else:
+            if not isinstance(items, Mapping):
+                items = Counter(items)
+            keys = pd.Index(list(items.keys())).to_numpy()
+            counts = np.fromiter(items.values(), dtype=np.int64, count=len(items))
+        if len(keys):
+            ids = self._ids(keys)
+            self._counts[ids] += counts
+
+    @property
+    def counts(self) -> np.ndarray:
+        """
+        Counts in order of first insertion of their keys.
+        """
+        return self._counts[: len(self)]
+
+    def keys(self) -> np.ndarray:
+        """
+        Keys in order of first insertion.
+        """
+        self._flush()
+        return self._index.to_numpy()
+
+    def items(self) -> Iterable[Tuple[Hashable, int]]:
+        return zip(self.keys().tolist(), self.counts.tolist())
+
+    def to_series(self) -> pd.Series:
+        """
+        Convert to a pandas Series of counts indexed by key.
+        """
+        self._flush()
+        return pd.Series(self.counts, index=self._index, copy=False)
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        """
+        Get the `n` most common keys using `np.argpartition`.
+
+        Args:
+            n: Number of keys. Defaults to all keys.
+
+        Returns:
+            List of (key, count) sorted by decreasing count
+        """
+        counts = self.counts
+        if n is None or n >= len(counts):
+            top_ids = np.argsort(-counts, kind="stable")
+        else:
+            top_ids = np.argpartition(-counts, n - 1)[:n]
+            top_ids = top_ids[np.argsort(-counts[top_ids], kind="stable")]
+        keys = self.keys()[top_ids].tolist()
+        return list(zip(keys, counts[top_ids].tolist()))
+
+    def sorted(self, reverse: bool = False) -> pd.Series:
+        """
+        Get counts sorted by value.
+
+        Args:
+            reverse: Sort in decreasing order
+
+        Returns:
+            Series of counts indexed by key
+        """
+        return self.to_series().sort_values(ascending=not reverse, kind="stable")
+
+    def percent(self) -> pd.Series:
+        """
+        Get the percentage of the total count of each key.
+
+        Returns:
+            Series of percentages indexed by key
+        """
+        series = self.to_series()
+        return series / series.sum() * 100.0
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Save keys and counts to a `.npz` file.
+
+        Args:
+            path: File path
+
+        Returns:
+            None
+        """
+        np.savez(path, keys=self.keys(), counts=self.counts)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "CompactCounter":
+        """
+        Load a counter saved with `save`.
+
+        Args:
+            path: File path
+
+        Returns:
+            CompactCounter
+        """
+        with np.load(path, allow_pickle=True) as data:
+            counter = cls(dtype=data["counts"].dtype)
+            counter.__setstate__({"keys": data["keys"], "counts": data["counts"]})
+        return counter
+
+    def __getstate__(self) -> Dict:
+        return {"keys": self.keys(), "counts": self.counts.copy()}
+
+    def __setstate__(self, state: Dict) -> None:
+        self._index = pd.Index(state["keys"])
+        self._pending = {}
+        self._counts = state["counts"]
+
+    def __getitem__(self, key: Hashable) -> int:
+        if key in self._pending:
+            return int(self._counts[self._pending[key]])
+        position = self._index.get_indexer([key])[0]
+        return 0 if position == -1 else int(self._counts[position])
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._pending or key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index) + len(self._pending)
@@ -0,0 +1,487 @@
+import hashlib
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from fns.fns import minibatch
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingles(text: str, size: int = 5, words: bool = False) -> Set[str]:
+    """
+    Split a text into the set of its overlapping character or word n-grams.
+
+    Usage:
+    ```python
+    >>> sorted(shingles("hello", size=3))
+    ['ell', 'hel', 'llo']
+    ```
+
+    Args:
+        text: Sentence
+        size: Number of characters or words per shingle
+        words: Use word n-grams instead of character n-grams
+
+    Returns:
+        Set of shingles
+    """
+    tokens = text.split() if words else text
+    if len(tokens) <= size:
+        return {" ".join(tokens) if words else text} if tokens else set()
+    if words:
+        return {" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)}
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHash:
+    """
+    Compute MinHash signatures to estimate Jaccard similarity of texts.
+
+    All permutations of a text's shingle hashes are computed at once with
+    NumPy. Signatures from the same `num_perm` and `seed` are comparable
+    across processes and runs.
+
+    Usage:
+    ```python
+    >>> minhash = MinHash(num_perm=128)
+    >>> a, b = minhash.signatures(["the quick brown fox", "the quick brown dog"])
+    >>> estimate_jaccard(a, b)
+    ```
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1, shingle_size: int = 5):
+        """
+        Args:
+            num_perm: Number of hash permutations. More is more accurate.
+            seed: Random seed of the permutations
+            shingle_size: Number of characters per shingle
+        """
+        self.num_perm = num_perm
+        self.seed = seed
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text: Sentence
+
+        Returns:
+            Array of `num_perm` uint32 values
+        """
+        hashes = np.fromiter(
+            (
+                zlib.crc32(shingle.encode("utf-8"))
+                for shingle in shingles(text, self.shingle_size)
+            ),
+            dtype=np.uint64,
+        )
+        if len(hashes) == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        # Overflow in the multiplication is intended and acts as extra mixing
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=0).astype(np.uint32)
+
+    def signatures(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Compute MinHash signatures of many texts.
+
+        Args:
+            texts: List of sentences
+
+        Returns:
+            Array of shape (number of texts, num_perm)
+        """
+        return np.array(
+            [self.signature(text) for text in texts], dtype=np.uint32
+        ).reshape(-1, self.num_perm)
+
+
+def estimate_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Estimate the Jaccard similarity of two texts from their MinHash signatures.
+
+    Args:
+        a: First signature
+        b: Second signature
+
+    Returns:
+        Estimated Jaccard similarity
+    """
+    return float(np.mean(a == b))
+
+
+def _optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Choose bands and rows minimizing false positive and negative probabilities.
+
+    Reference: http://infolab.stanford.edu/~ullman/mmds/ch3.pdf
+    """
+    similarities = np.linspace(0, 1, 1001)
+    below = similarities < threshold
+    best, best_error = (1, num_perm), np.inf
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        # Probability that two texts share at least one band
+        probability = 1 - (1 - similarities**rows) ** bands
+        false_positive = probability[below].sum()
+        false_negative = (1 - probability[~below]).sum()
+        error = false_positive + false_negative
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class LSHIndex:
+    """
+    Find near-duplicate texts with MinHash and locality-sensitive hashing.
+
+    Signatures are split into bands, and texts sharing any band are
+    candidates which are then verified with their estimated Jaccard
+    similarity. Inserting and querying take roughly constant time, so
+    deduplicating a corpus is roughly linear in its size.
+
+    Usage:
+    ```python
+    >>> index = LSHIndex(threshold=0.8)
+    >>> index.add_texts(texts)
+    >>> index.clusters()
+    [[0, 12], [5, 7, 9]]
+    ```
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        seed: int = 1,
+        shingle_size: int = 5,
+    ):
+        """
+        Args:
+            threshold: Minimum Jaccard similarity of near-duplicates
+            num_perm: Number of MinHash permutations
+            seed: Random seed of the permutations
+            shingle_size: Number of characters per shingle
+        """
+        self.threshold = threshold
+        self.minhash = MinHash(num_perm, seed=seed, shingle_size=shingle_size)
+        self.bands, self.rows = _optimal_bands(threshold, num_perm)
+        self.keys: List[Hashable] = []
+        self._signatures: List[np.ndarray] = []
+        self._buckets: List[Dict[bytes, List[int]]] = [
+            defaultdict(list) for _ in range(self.bands)
+        ]
+
+    def _band_keys(self, signature: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start : start + self.rows].tobytes()
+
+    def insert(self, key: Hashable, signature: np.ndarray) -> None:
+        """
+        Add a signature to the index.
+
+        Args:
+            key: Identifier of the text
+            signature: MinHash signature of the text
+
+        Returns:
+            None
+        """
+        signature = np.asarray(signature, dtype=np.uint32)
+        position = len(self.keys)
+        self.keys.append(key)
+        self._signatures.append(signature)
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band][band_key].append(position)
+
+    def add_texts(
+        self, texts: Iterable[str], keys: Optional[Iterable[Hashable]] = None
+    ) -> None:
+        """
+        Add texts to the index.
+
+        Args:
+            texts: List of sentences
+            keys: Identifiers of the texts. Defaults to their insertion position.
+
+        Returns:
+            None
+        """
+        if keys is None:
+            for text in texts:
+                self.insert(len(self.keys), self.minhash.signature(text))
+        else:
+            for key, text in zip(keys, texts):
+                self.insert(key, self.minhash.signature(text))
+
+    def query(self, text_or_signature: Union[str, np.ndarray]) -> List[Hashable]:
+        """
+        Find indexed texts similar to a text.
+
+        Args:
+            text_or_signature: Sentence or its MinHash signature
+
+        Returns:
+            Keys of texts with estimated similarity above the threshold
+        """
+        signature = text_or_signature
+        if isinstance(signature, str):
+            signature = self.minhash.signature(signature)
+        candidates = set()
+        for band, band_key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        return [
+            self.keys[position]
+            for position in sorted(candidates)
+            if estimate_jaccard(signature, self._signatures[position]) >= self.threshold
+        ]
+
+    def clusters(self) -> List[List[Hashable]]:
+        """
+        Group indexed texts into clusters of near-duplicates.
+
+        Returns:
+            List of clusters with more than one text, as lists of keys
+        """
+        parent = list(range(len(self.keys)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        # Every pair sharing a bucket is a candidate, not only pairs with the
+        # bucket's first member, so clusters agree with `query`. Identical
+        # signatures, e.g. from retweets, are merged in one step and only
+        # distinct signatures not already in the same cluster are compared.
+        for buckets in self._buckets:
+            for positions in buckets.values():
+                if len(positions) < 2:
+                    continue
+                positions = np.asarray(positions)
+                signatures = np.array([self._signatures[p] for p in positions])
+                signatures, first, inverse = np.unique(
+                    signatures, axis=0, return_index=True, return_inverse=True
+                )
+                for position, group in zip(positions.tolist(), inverse.ravel()):
+                    parent[find(position)] = find(int(positions[first[group]]))
+                distinct = positions[first]
+                for i in range(len(distinct) - 1):
+                    root = find(int(distinct[i]))
+                    others = np.arange(i + 1, len(distinct))
+                    others = others[[find(int(distinct[j])) != root for j in others]]
+                    if not len(others):
+                        continue
+                    similarity = np.mean(signatures[others] == signatures[i], axis=1)
+                    for j in others[similarity >= self.threshold]:
+                        parent[find(int(distinct[j]))] = find(root)
+
+        groups = defaultdict(list)
+        for position in range(len(self.keys)):
+            groups[find(position)].append(self.keys[position])
+        return [group for group in groups.values() if len(group) > 1]
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Save the signatures and settings to a `.npz` file.
+
+        Args:
+            path: File path
+
+        Returns:
+            None
+        """
+        np.savez(
+            path,
+            keys=np.array(self.keys, dtype=object),
+            signatures=np.array(self._signatures, dtype=np.uint32).reshape(
+                -1, self.minhash.num_perm
+            ),
+            settings=np.array(
+                [
+                    self.threshold,
+                    self.minhash.num_perm,
+                    self.minhash.seed,
+                    self.minhash.shingle_size,
+                ]
+            ),
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "LSHIndex":
+        """
+        Load an index saved with `save`.
+
+        Args:
+            path: File path
+
+        Returns:
+            LSHIndex
+        """
+        with np.load(path, allow_pickle=True) as data:
+            threshold, num_perm, seed, shingle_size = data["settings"].tolist()
+            index = cls(threshold, int(num_perm), int(seed), int(shingle_size))
+            for key, signature in zip(data["keys"].tolist(), data["signatures"]):
+                index.insert(key, signature)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+def near_duplicates(
+    texts: Iterable[str], threshold: float = 0.8, num_perm: int = 128
+) -> List[List[int]]:
+    """
+    Find clusters of near-duplicate texts.
+
+    Args:
+        texts: List of sentences
+        threshold: Minimum Jaccard similarity of character shingles
+        num_perm: Number of MinHash permutations
+
+    Returns:
+        Clusters of text indices
+    """
+    index = LSHIndex(threshold=threshold, num_perm=num_perm)
+    index.add_texts(texts)
+    return index.clusters()
+
+
+def hash64(texts: Iterable[str]) -> np.ndarray:
+    """
+    Hash texts to 64-bit integers with BLAKE2b.
+
+    Args:
+        texts: List of sentences
+
+    Returns:
+        Array of uint64 hashes
+    """
+    digests = b"".join(
+        hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest() for text in texts
+    )
+    return np.frombuffer(digests, dtype="<u8")
+
+
+class HashSet64:
+    """
+    Set of 64-bit hashes stored in sorted NumPy arrays.
+
+    Each hash takes 8 bytes. Hashes are kept in a few sorted runs which are
+    merged as they grow, like a log-structured merge tree, so adding a batch
+    costs amortized O(batch log n) and membership is a binary search per run.
+    """
+
+    def __init__(self):
+        self._runs: List[np.ndarray] = []
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Check which hashes are in the set.
+
+        Args:
+            hashes: Array of uint64 hashes
+
+        Returns:
+            Boolean mask
+        """
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            positions = np.searchsorted(run, hashes).clip(max=len(run) - 1)
+            found |= run[positions] == hashes
+        return found
+
+    def add(self, hashes: np.ndarray) -> None:
+        """
+        Add hashes to the set.
+
+        Args:
+            hashes: Array of uint64 hashes not yet in the set
+
+        Returns:
+            None
+        """
+        if len(hashes) == 0:
+            return
+        self._runs.append(np.unique(hashes))
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            last = self._runs.pop()
+            self._runs[-1] = np.sort(np.concatenate([self._runs[-1], last]))
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self._runs)
+
+
+def dedupe_texts(
+    texts: Iterable[str],
+    normalize: Union[Callable[[str], str], Sequence[Callable[[str], str]], None] = None,
+    batch_size: int = 100_000,
+    return_index: bool = False,
+) -> Iterator[Union[str, Tuple[int, str]]]:
+    """
+    Lazily drop exact duplicate texts, keeping the first occurrence.
+
+    Texts are hashed to 64 bits in batches and remembered in a `HashSet64`,
+    which costs 8 bytes per unique text. With 64-bit hashes, the chance of
+    any false duplicate among a billion unique texts is about 3%.
+
+    Usage:
+    ```python
+    >>> texts = ["a b", "A  b", "c"]
+    >>> list(dedupe_texts(texts, normalize=[str.lower, remove_multiple_space]))
+    ['a b', 'c']
+    ```
+
+    Args:
+        texts: List or iterator of sentences
+        normalize: Function or list of functions, such as `fns.preprocessing`
+            cleaners, applied before comparing texts. The original texts
+            are returned.
+        batch_size: Number of texts hashed at a time
+        return_index: Yield (position, text) tuples instead of texts
+
+    Returns:
+        Iterator of unique texts in their original order
+    """
+    if callable(normalize):
+        normalize = [normalize]
+    seen = HashSet64()
+    offset = 0
+    for batch in minibatch(texts, batch_size):
+        keys = batch
+        for function in normalize or ():
+            keys = [function(key) for key in keys]
+        hashes = hash64(keys)
+        _, first = np.unique(hashes, return_index=True)
+        first.sort()
+        is_new = ~seen.contains(hashes[first])
+        seen.add(hashes[first[is_new]])
+        for position in first[is_new].tolist():
+            text = batch[position]
+            yield (offset + position, text) if return_index else text
+        offset += len(batch)
@@ -1,16 +1,47 @@
 import argparse
 import base64
+import bz2
+import contextlib
+import fnmatch
+import functools
+import gzip
+import hashlib
+import io
 import itertools
 import json
+import lzma
 import math
+import mmap
 import os
 import pickle
+import tempfile
 import time
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Union, Iterator, Any, IO
-
-from fns.text import md5_hash
+from typing import (
+    List,
+    Dict,
+    Set,
+    Union,
+    Iterator,
+    Iterable,
+    Any,
+    IO,
+    Callable,
+    Optional,
+)
+
+import numpy as np
+
+from fns.counting import CompactCounter, SpaceSaving
+from fns.json_encoders import NpEncoder
+from fns.text import md5_hash, sliding_windows
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 def flatten(x: List[List]) -> Iterator:
@@ -58,12 +89,14 @@ def sort_dict_by_value(d: Dict, reverse: bool = False) -> Dict:
     ```
 
     Args:
-        d: Python Dictionary
+        d: Python Dictionary or `fns.counting.CompactCounter`
         reverse: Sort order
 
     Returns:
         Sorted dictionary
     """
+    if isinstance(d, CompactCounter):
+        return d.sorted(reverse=reverse).to_dict()
     return dict(sorted(d.items(), key=lambda item: item[1], reverse=reverse))
 
 
@@ -85,26 +118,40 @@ def percent_dict(d: Dict) -> Dict:
     Convert a dictionary of key-value to key:coverage-percent.
 
     Args:
-        d: Dictionary of key and values
+        d: Dictionary of key and values or `fns.counting.CompactCounter`
 
     Returns:
         Dictionary of key and percent-coverage
     """
+    if isinstance(d, CompactCounter):
+        return d.percent().to_dict()
     total = sum(d.values())
     return {key: value / total * 100.0 for key, value in d.items()}
 
 
-def top(data, n: int = 5) -> Dict:
+def top(
+    data, n: int = 5, approximate: bool = False, capacity: Optional[int] = None
+) -> Dict:
     """
     Get a dictionary of top-n items from a list.
 
+    With `approximate=True`, counts are estimated with a bounded-memory
+    `fns.counting.SpaceSaving` counter instead of an exact `Counter`.
+
     Args:
         data: Python collection
         n: Number of top-values
+        approximate: Use bounded memory for streams with many distinct items
+        capacity: Number of items tracked in approximate mode.
+            Defaults to `max(10 * n, 1000)`.
 
     Returns:
         Dictionary of top-n items and count
     """
+    if approximate:
+        counter = SpaceSaving(capacity or max(10 * n, 1000))
+        counter.update(data)
+        return dict(counter.most_common(n))
     return dict(Counter(data).most_common(n))
 
 
@@ -113,12 +160,14 @@ def top_n_from_dict(dictionary: Dict, n: int = 10):
     Get top n largest values from the dictionary.
 
     Args:
-        dictionary: Python dictionary
+        dictionary: Python dictionary or `fns.counting.CompactCounter`
         n: Number of keys to pick
 
     Returns:
-
+        Dictionary of top-n keys and values
     """
+    if isinstance(dictionary, CompactCounter):
+        return dict(dictionary.most_common(n))
     return top(dictionary, n=n)
 
 
@@ -153,33 +202,302 @@ def write_json(item: Dict, path: Union[Path, str], mode: str = "w") -> None:
         json.dump(item, fp)
 
 
-def read_pickle(path: Union[str, Path]) -> Any:
+COMPRESSION_EXTENSIONS = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".zst": "zstd",
+    ".lz4": "lz4",
+}
+
+
+def open_file(path: Union[str, Path], mode: str = "r", compression: str = "infer"):
+    """
+    Open a file, transparently (de)compressing it based on its extension.
+
+    Supported: gzip (.gz), bz2 (.bz2), xz (.xz), zstd (.zst) and lz4 (.lz4).
+    zstd and lz4 need the optional `zstandard` and `lz4` packages.
+
+    Args:
+        path: File path
+        mode: File mode such as "r", "wb" or "a"
+        compression: "infer" from the extension, None for plain files or
+            one of gzip, bz2, xz, zstd and lz4
+
+    Returns:
+        File object
+    """
+    if compression == "infer":
+        compression = COMPRESSION_EXTENSIONS.get(Path(path).suffix.lower())
+    if compression is None:
+        return open(path, mode)
+    if "b" not in mode and "t" not in mode:
+        mode += "t"
+    if compression == "gzip":
+        return gzip.open(path, mode)
+    if compression == "bz2":
+        return bz2.open(path, mode)
+    if compression == "xz":
+        return lzma.open(path, mode)
+    if compression == "zstd":
+        import zstandard
+
+        return zstandard.open(path, mode)
+    if compression == "lz4":
+        import lz4.frame
+
+        return lz4.frame.open(path, mode)
+    raise ValueError(f"Unknown compression: {compression!r}")
+
+
+def _dumps_json(item: Any) -> bytes:
+    if orjson is not None:
+        line = orjson.dumps(
+            item, default=NpEncoder().default, option=orjson.OPT_NON_STR_KEYS
+        )
+        # orjson writes NaN and infinity as null. Encode such lines with
+        # json instead, so the output doesn't depend on orjson being installed.
+        if b"null" not in line:
+            return line
+    return json.dumps(
+        item, cls=NpEncoder, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def _loads_json(line: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            # NaN and Infinity are accepted by json but not by orjson
+            pass
+    return json.loads(line)
+
+
+def iter_jsonl(
+    path: Union[str, Path], batch_size: Optional[int] = None
+) -> Iterator[Union[Dict, List[Dict]]]:
+    """
+    Lazily read records from a JSON Lines file.
+
+    Compressed files are decompressed on the fly based on their extension.
+    `orjson` is used for parsing when it is installed.
+
+    Usage:
+    ```python
+    >>> for batch in iter_jsonl("data.jsonl.gz", batch_size=1000):
+    ...     process(batch)
+    ```
+
+    Args:
+        path: File path
+        batch_size: Yield lists of this many records instead of single records
+
+    Returns:
+        Iterator of records or of batches of records
+    """
+    with open_file(path, "rb") as fp:
+        records = (_loads_json(line) for line in fp if line.strip())
+        if batch_size:
+            yield from minibatch(records, batch_size)
+        else:
+            yield from records
+
+
+def write_jsonl(
+    items: Iterable[Dict],
+    path: Union[str, Path],
+    mode: str = "w",
+    batch_size: int = 1000,
+) -> int:
+    """
+    Stream records to a JSON Lines file.
+
+    Numpy values are serialized like `fns.json_encoders.NpEncoder`. `orjson`
+    is used for encoding when it is installed and gives the same output as
+    `json`, with compact separators and non-ASCII characters kept as is.
+
+    Args:
+        items: Iterable of records
+        path: File path. Compressed based on its extension.
+        mode: "w" to overwrite or "a" to append
+        batch_size: Number of records encoded per write call
+
+    Returns:
+        Number of records written
+    """
+    count = 0
+    with open_file(path, mode.replace("b", "") + "b") as fp:
+        for batch in minibatch(items, batch_size):
+            fp.write(b"".join(_dumps_json(item) + b"\n" for item in batch))
+            count += len(batch)
+    return count
+
+
+class _BufferIndex:
+    """
+    Header stored in front of a pickle whose buffers live in a sidecar file.
+
+    The sidecar starts with a random token that is also stored here, so a
+    pickle is never combined with the buffers of another write.
+    """
+
+    def __init__(self, offsets: List[int], lengths: List[int], token: bytes):
+        self.offsets = offsets
+        self.lengths = lengths
+        self.token = token
+
+
+_BUFFER_ALIGNMENT = 64
+
+
+def _buffers_path(path: Union[str, Path]) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + ".buffers")
+
+
+def _load_buffers(path: Path, index: _BufferIndex, use_mmap: bool) -> List:
+    with open(path, "rb") as fp:
+        if fp.read(len(index.token)) != index.token:
+            raise ValueError(
+                f"{path} does not belong to this pickle, it was probably "
+                "overwritten by another write"
+            )
+        fp.seek(0)
+        if use_mmap and os.fstat(fp.fileno()).st_size > 0:
+            data = memoryview(mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            data = memoryview(bytearray(fp.read()))
+    return [
+        data[offset : offset + length]
+        for offset, length in zip(index.offsets, index.lengths)
+    ]
+
+
+def read_pickle(
+    path: Union[str, Path], compression: Optional[str] = "infer", use_mmap: bool = True
+) -> Any:
     """
     Read a pickle file from path.
 
+    Pickles written with `out_of_band=True` get their buffers from the
+    `.buffers` sidecar file. With `use_mmap`, large numpy arrays are then
+    memory-mapped zero-copy and are read-only.
+
     Args:
         path: File path
+        compression: Compression passed to `open_file`, inferred from the extension
+        use_mmap: Memory-map out-of-band buffers instead of reading them
 
     Returns:
         Unpickled object
     """
-    with open(path, "rb") as fp:
-        return pickle.load(fp)
+    with open_file(path, "rb", compression=compression) as fp:
+        item = pickle.load(fp)
+        if isinstance(item, _BufferIndex):
+            buffers = _load_buffers(_buffers_path(path), item, use_mmap)
+            item = pickle.load(fp, buffers=buffers)
+    return item
+
+
+def _read_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
 
 
-def write_pickle(item: Any, path: Union[Path, str]) -> None:
+# Read once at import: setting the umask to read it is not thread-safe.
+_UMASK = _read_umask()
+
+
+@contextlib.contextmanager
+def _atomic_write(path: Path, atomic: bool) -> Iterator[Path]:
+    """
+    Yield a path to write to, which is moved over `path` on success.
+    """
+    if not atomic:
+        yield path
+        return
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    os.close(fd)
+    try:
+        yield Path(temp_path)
+        # mkstemp creates the file with mode 0600, give it the permissions
+        # of a file created by `open` instead.
+        os.chmod(temp_path, 0o666 & ~_UMASK)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    os.replace(temp_path, path)
+
+
+def write_pickle(
+    item: Any,
+    path: Union[Path, str],
+    protocol: Optional[int] = None,
+    compression: Optional[str] = "infer",
+    out_of_band: bool = False,
+    atomic: bool = False,
+) -> None:
     """
     Pickle a python object.
 
+    Usage:
+    ```python
+    >>> write_pickle({"features": big_array}, "cache.pkl", out_of_band=True)
+    >>> features = read_pickle("cache.pkl")["features"]  # memory-mapped
+    ```
+
     Args:
         item: Python object
         path: File path to save the pickle file
+        protocol: Pickle protocol. Defaults to `pickle.DEFAULT_PROTOCOL`.
+        compression: Compression passed to `open_file`, inferred from the extension
+        out_of_band: Use protocol 5 and write large buffers such as numpy
+            arrays uncompressed to a `.buffers` sidecar instead of copying
+            them into the pickle stream.
+        atomic: Write to a temporary file first and rename it into place,
+            so readers never see a partially written file. The pickle and
+            its sidecar are replaced one after the other; if a crash leaves
+            them from different writes, `read_pickle` raises a ValueError.
 
     Returns:
         None
     """
-    with open(path, "wb") as fp:
-        pickle.dump(item, fp)
+    path = Path(path)
+    if compression == "infer":
+        compression = COMPRESSION_EXTENSIONS.get(path.suffix.lower())
+    buffers_path = _buffers_path(path)
+
+    if not out_of_band:
+        with _atomic_write(path, atomic) as temp_path:
+            with open_file(temp_path, "wb", compression=compression) as fp:
+                pickle.dump(item, fp, protocol=protocol)
+        if buffers_path.exists():
+            buffers_path.unlink()
+        return None
+
+    if pickle.HIGHEST_PROTOCOL < 5:
+        raise ValueError("Out-of-band pickling requires python 3.8 or above")
+    buffers = []
+    payload = pickle.dumps(item, protocol=5, buffer_callback=buffers.append)
+
+    offsets, lengths = [], []
+    token = os.urandom(16)
+    with _atomic_write(buffers_path, atomic) as temp_path:
+        with open(temp_path, "wb") as fp:
+            fp.write(token)
+            for buffer in buffers:
+                fp.write(b"\0" * (-fp.tell() % _BUFFER_ALIGNMENT))
+                with buffer.raw() as raw:
+                    offsets.append(fp.tell())
+                    lengths.append(raw.nbytes)
+                    fp.write(raw)
+
+    with _atomic_write(path, atomic) as temp_path:
+        with open_file(temp_path, "wb", compression=compression) as fp:
+            pickle.dump(_BufferIndex(offsets, lengths, token), fp, protocol=5)
+            fp.write(payload)
 
 
 def parse_manual(parser: argparse.ArgumentParser, command: str) -> argparse.Namespace:
@@ -197,49 +515,272 @@ def parse_manual(parser: argparse.ArgumentParser, command: str) -> argparse.Name
     return parser.parse_args(args=args)
 
 
-def hash_file(file_object: IO):
+HASH_ALGORITHMS = ("md5", "sha1", "sha256", "blake2b")
+
+
+def _new_hash(algorithm: str):
+    if algorithm not in HASH_ALGORITHMS:
+        raise ValueError(
+            f"Unsupported algorithm: {algorithm!r}. Choose from {HASH_ALGORITHMS}"
+        )
+    return hashlib.new(algorithm)
+
+
+def _hash_path(path: Union[str, Path], algorithm: str, chunk_size: int, use_mmap: bool):
+    hasher = _new_hash(algorithm)
+    with open(path, "rb") as fp:
+        if use_mmap and os.fstat(fp.fileno()).st_size > 0:
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for start in range(0, len(view), chunk_size):
+                        hasher.update(view[start : start + chunk_size])
+                finally:
+                    view.release()
+        else:
+            for chunk in iter(lambda: fp.read(chunk_size), b""):
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def hash_file(
+    file_object: Union[IO, str, Path],
+    algorithm: str = "md5",
+    chunk_size: int = 1 << 20,
+    use_mmap: bool = False,
+) -> str:
     """
-    Calculate MD5 hash of file.
+    Calculate hash of a file by reading it in fixed-size chunks.
+
+    Memory usage stays constant regardless of the file size. Text handles
+    are hashed on their UTF-8 encoded content.
+
+    Usage:
+    ```python
+    >>> hash_file("model.bin", algorithm="sha256")
+    ```
 
     Args:
-        file_object: File object
+        file_object: File object opened in text or binary mode, or a file path
+        algorithm: One of md5, sha1, sha256 or blake2b
+        chunk_size: Number of bytes or characters read at a time
+        use_mmap: Memory-map the file instead of reading it. Only used for paths.
 
     Returns:
-        MD5 hash of the file
+        Hex digest of the file
     """
-    # Calculate hash
-    unique_hash = md5_hash(file_object.read())
+    if isinstance(file_object, (str, Path)):
+        return _hash_path(file_object, algorithm, chunk_size, use_mmap)
 
-    # Reset file pointer to start
-    file_object.seek(0)
+    hasher = _new_hash(algorithm)
+    position = file_object.tell()
+    while True:
+        chunk = file_object.read(chunk_size)
+        if not chunk:
+            break
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        hasher.update(chunk)
 
-    return unique_hash
+    # Reset file pointer to where it was
+    file_object.seek(position)
 
+    return hasher.hexdigest()
 
-def num_files(path: Union[Path, str]) -> int:
+
+def hash_directory(
+    path: Union[str, Path],
+    pattern: str = "*",
+    algorithm: str = "md5",
+    workers: Optional[int] = None,
+    chunk_size: int = 1 << 20,
+    use_mmap: bool = False,
+) -> Dict[str, str]:
+    """
+    Hash every file under a directory concurrently.
+
+    Files are hashed on a thread pool since hashlib releases the GIL on
+    large buffers.
+
+    Usage:
+    ```python
+    >>> hashes = hash_directory("data/", pattern="*.parquet", algorithm="sha256")
+    >>> fingerprint = md5_hash(json.dumps(hashes))
+    ```
+
+    Args:
+        path: Directory path
+        pattern: Glob pattern matched recursively against file names
+        algorithm: One of md5, sha1, sha256 or blake2b
+        workers: Number of threads
+        chunk_size: Number of bytes read at a time
+        use_mmap: Memory-map files instead of reading them
+
+    Returns:
+        Dictionary of relative file path to hex digest, sorted by path
+    """
+    _new_hash(algorithm)
+    root = Path(path)
+    files = sorted(Path(p) for p in iter_files(root, pattern=pattern))
+    digests = parallel_map(
+        functools.partial(
+            _hash_path, algorithm=algorithm, chunk_size=chunk_size, use_mmap=use_mmap
+        ),
+        files,
+        workers=workers,
+    )
+    return {
+        file.relative_to(root).as_posix(): digest
+        for file, digest in zip(files, digests)
+    }
+
+
+def iter_files(
+    path: Union[Path, str],
+    recursive: bool = True,
+    pattern: Optional[str] = None,
+    extensions: Optional[Iterable[str]] = None,
+    kind: str = "file",
+) -> Iterator[str]:
+    """
+    Lazily yield paths under a directory using `os.scandir`.
+
+    Only one directory listing is held in memory at a time. Symbolic links
+    count as the kind of their target, but links to directories are not
+    descended into.
+
+    Usage:
+    ```python
+    >>> for path in iter_files("images/", extensions=[".jpg", ".png"]):
+    ...     process(path)
+    ```
+
+    Args:
+        path: Directory path
+        recursive: Whether to descend into subdirectories
+        pattern: Glob pattern matched against the entry name, e.g. "*.txt"
+        extensions: File extensions to keep, e.g. [".jpg", ".png"]
+        kind: "file", "dir" or "all". "all" also yields broken links and
+            special files.
+
+    Returns:
+        Iterator of paths as strings
+    """
+    if kind not in ("file", "dir", "all"):
+        raise ValueError(f"kind must be 'file', 'dir' or 'all', got {kind!r}")
+    if extensions is not None:
+        extensions = tuple(e.lower() for e in extensions)
+
+    directories = [os.fspath(path)]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                # Links are classified by their target, but only real
+                # directories are descended into.
+                if recursive and entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+                if kind == "file" and not entry.is_file():
+                    continue
+                if kind == "dir" and not entry.is_dir():
+                    continue
+                if pattern is not None and not fnmatch.fnmatch(entry.name, pattern):
+                    continue
+                if extensions is not None and not entry.name.lower().endswith(
+                    extensions
+                ):
+                    continue
+                yield entry.path
+
+
+def count_files(
+    path: Union[Path, str],
+    recursive: bool = True,
+    pattern: Optional[str] = None,
+    extensions: Optional[Iterable[str]] = None,
+    kind: str = "file",
+    workers: Optional[int] = None,
+) -> int:
+    """
+    Count paths under a directory without materialising the listing.
+
+    Args:
+        path: Directory path
+        recursive: Whether to descend into subdirectories
+        pattern: Glob pattern matched against the entry name, e.g. "*.txt"
+        extensions: File extensions to keep, e.g. [".jpg", ".png"]
+        kind: "file", "dir" or "all"
+        workers: Traverse top-level subdirectories in parallel with this many threads
+
+    Returns:
+        Number of matching paths
+    """
+    options = dict(pattern=pattern, extensions=extensions, kind=kind)
+    if not (recursive and workers):
+        return sum(1 for _ in iter_files(path, recursive=recursive, **options))
+
+    count = sum(1 for _ in iter_files(path, recursive=False, **options))
+    subdirectories = iter_files(path, recursive=False, kind="dir")
+    counts = parallel_map(
+        functools.partial(count_files, recursive=True, **options),
+        subdirectories,
+        workers=workers,
+    )
+    return count + sum(counts)
+
+
+def num_files(
+    path: Union[Path, str],
+    recursive: bool = False,
+    pattern: Optional[str] = None,
+    extensions: Optional[Iterable[str]] = None,
+) -> int:
     """
     Get the number of files in a path.
 
+    Subdirectories are not counted. See `count_files` for more options.
+
     Args:
         path: File path
+        recursive: Whether to count files in subdirectories
+        pattern: Glob pattern matched against the file name, e.g. "*.txt"
+        extensions: File extensions to keep, e.g. [".jpg", ".png"]
 
     Returns:
         Number of files
     """
-    return len(os.listdir(path))
+    return count_files(
+        path, recursive=recursive, pattern=pattern, extensions=extensions
+    )
 
 
-def ngrams(tokens: List, n: int):
+def ngrams(tokens: Union[List, np.ndarray], n: int, lazy: bool = False):
     """
+    Generate all consecutive n-grams of a sequence.
+
+    NumPy arrays are returned as a read-only strided view of shape
+    `(len(tokens) - n + 1, n)`, which does not copy the tokens.
+
+    Usage:
+    ```python
+    >>> ngrams([1, 2, 3], 2)
+    [[1, 2], [2, 3]]
+    >>> ngrams(np.array([1, 2, 3]), 2)
+    array([[1, 2],
+           [2, 3]])
+    ```
 
     Args:
-        tokens: List of elements
+        tokens: List of elements or 1D NumPy array
         n: N-gram size
+        lazy: Return a generator instead of a list
 
     Returns:
-        List of ngrams
+        List of ngrams, generator of ngrams or 2D array view
     """
-    return [tokens[i : i + n] for i in range(len(tokens) - n + 1)]
+    if isinstance(tokens, np.ndarray):
+        return sliding_windows(tokens, n)
+    grams = (tokens[i : i + n] for i in range(len(tokens) - n + 1))
+    return grams if lazy else list(grams)
 
 
 def print_json(d: Dict) -> None:
@@ -255,31 +796,181 @@ def print_json(d: Dict) -> None:
     print(json.dumps(d, indent=4))
 
 
+def _iter_chunks(source: Union[str, Path, IO, bytes], chunk_size: int) -> Iterator:
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as fp:
+            yield from iter(lambda: fp.read(chunk_size), b"")
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for start in range(0, len(view), chunk_size):
+            yield view[start : start + chunk_size]
+    elif hasattr(source, "read"):
+        yield from iter(lambda: source.read(chunk_size), source.read(0))
+    else:
+        yield from source
+
+
+def iter_base64(
+    source: Union[str, Path, IO, bytes], chunk_size: int = 3 << 20
+) -> Iterator[bytes]:
+    """
+    Lazily base64-encode a file in fixed-size blocks.
+
+    Memory usage is proportional to `chunk_size` instead of the file size.
+
+    Usage:
+    ```python
+    >>> with open("image.png.b64", "wb") as fp:
+    ...     fp.writelines(iter_base64("image.png"))
+    ```
+
+    Args:
+        source: File path, file object or bytes. Text is encoded as UTF-8.
+        chunk_size: Number of input bytes encoded at a time.
+            Rounded down to a multiple of 3 so blocks can be concatenated.
+
+    Returns:
+        Iterator of base64-encoded bytes
+    """
+    chunk_size = max(chunk_size - chunk_size % 3, 3)
+    remainder = b""
+    for chunk in _iter_chunks(source, chunk_size):
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        chunk = remainder + bytes(chunk)
+        cutoff = len(chunk) - len(chunk) % 3
+        remainder = chunk[cutoff:]
+        if cutoff:
+            yield base64.b64encode(chunk[:cutoff])
+    if remainder:
+        yield base64.b64encode(remainder)
+
+
+_BASE64_WHITESPACE = b" \t\r\n"
+
+
+def iter_base64_decode(
+    source: Union[str, Path, IO, Iterable], chunk_size: int = 4 << 20
+) -> Iterator[bytes]:
+    """
+    Lazily decode base64 data in fixed-size blocks.
+
+    Whitespace such as line breaks between blocks is ignored.
+
+    Args:
+        source: File path, file object or iterable of base64 str or bytes chunks
+        chunk_size: Number of encoded characters read at a time from files
+
+    Returns:
+        Iterator of decoded bytes
+    """
+    remainder = b""
+    for chunk in _iter_chunks(source, chunk_size):
+        if isinstance(chunk, str):
+            chunk = chunk.encode("ascii")
+        chunk = remainder + bytes(chunk).translate(None, _BASE64_WHITESPACE)
+        cutoff = len(chunk) - len(chunk) % 4
+        remainder = chunk[cutoff:]
+        if cutoff:
+            yield base64.b64decode(chunk[:cutoff])
+    if remainder:
+        yield base64.b64decode(remainder)
+
+
+class _ChunkReader(io.RawIOBase):
+    """
+    Read-only file object over an iterator of bytes.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            self._buffer = next(self._chunks, None)
+            if self._buffer is None:
+                self._buffer = b""
+                return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
 def read_as_base64(path: Union[str, Path]) -> str:
     """
     Convert file contents into a base64 string
 
+    The file is read as bytes, so binary files are supported.
+    Use `iter_base64` for large files.
+
     Args:
         path: File path
 
     Returns:
         Base64 string
     """
-    content = Path(path).read_text()
-    return base64.b64encode(content.encode("utf-8")).decode("utf-8")
+    return base64.b64encode(Path(path).read_bytes()).decode("ascii")
 
 
-def base64_dict(base64_str: str) -> Dict:
+def base64_dict(base64_str: Union[str, IO, Iterable]) -> Dict:
     """
     Parse a base64-encoded JSON as dictionary.
 
+    File objects and chunk iterables are decoded incrementally, but the
+    decoded document is still parsed as a whole by `json.load`. Use
+    `iter_base64_json` to also stream the parsing.
+
     Args:
-        base64_str: Base-64 encoded string representation of JSON
+        base64_str: Base-64 encoded string representation of JSON, or a file
+            object or iterable of chunks to decode incrementally.
 
     Returns:
         Python Dictionary
     """
-    return json.loads(base64.b64decode(base64_str))
+    if isinstance(base64_str, (str, bytes)):
+        return json.loads(base64.b64decode(base64_str))
+    return json.load(io.BufferedReader(_ChunkReader(iter_base64_decode(base64_str))))
+
+
+def iter_base64_json(
+    source: Union[str, Path, IO, Iterable], prefix: str = "item"
+) -> Iterator[Any]:
+    """
+    Stream objects out of a large base64-encoded JSON document.
+
+    The payload is decoded block by block straight into the incremental
+    parser of the optional `ijson` package, so neither the encoded nor the
+    decoded document is ever fully in memory. Requires `ijson`, installed
+    with `pip install fns[ijson]`.
+
+    Usage:
+    ```python
+    >>> for record in iter_base64_json("records.json.b64", prefix="item"):
+    ...     process(record)
+    ```
+
+    Args:
+        source: File path, file object or iterable of base64 chunks
+        prefix: ijson prefix of the objects to yield. "item" yields the
+            elements of a top-level array.
+
+    Returns:
+        Iterator of parsed objects
+    """
+    try:
+        import ijson
+    except ImportError:
+        raise ImportError(
+            "iter_base64_json requires the ijson package: pip install fns[ijson]"
+        ) from None
+
+    reader = io.BufferedReader(_ChunkReader(iter_base64_decode(source)))
+    return ijson.items(reader, prefix)
 
 
 def format_as_hms(seconds: Union[int, float]) -> str:
@@ -331,6 +1022,61 @@ def minibatch(items, size):
         yield list(batch)
 
 
+def parallel_map(
+    func: Callable,
+    items: Iterable,
+    workers: Optional[int] = None,
+    executor: Union[str, Executor] = "thread",
+    max_pending: Optional[int] = None,
+) -> Iterator:
+    """
+    Lazily apply a function over items in parallel while preserving order.
+
+    At most `max_pending` items are in flight at once, so memory stays flat
+    even for very long iterators.
+
+    Usage:
+    ```python
+    >>> list(parallel_map(len, ["a", "bb", "ccc"], workers=2))
+    [1, 2, 3]
+    ```
+
+    Args:
+        func: Function applied to each item. Must be picklable for processes.
+        items: Iterable of inputs
+        workers: Number of workers. Defaults to the executor's default.
+        executor: "thread", "process" or an existing `concurrent.futures.Executor`
+        max_pending: Maximum number of submitted but unconsumed items.
+            Defaults to twice the number of workers.
+
+    Returns:
+        Iterator of results in the same order as items
+    """
+    if isinstance(executor, Executor):
+        pool, owns_pool = executor, False
+    elif executor == "thread":
+        pool, owns_pool = ThreadPoolExecutor(max_workers=workers), True
+    elif executor == "process":
+        pool, owns_pool = ProcessPoolExecutor(max_workers=workers), True
+    else:
+        raise ValueError(f"Unknown executor: {executor!r}")
+
+    max_pending = max_pending or 2 * (workers or os.cpu_count() or 1)
+    pending = deque()
+    try:
+        for item in items:
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+            pending.append(pool.submit(func, item))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if owns_pool:
+            pool.shutdown(wait=True)
+
+
 def harmonic_mean(a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
     """
     Compute harmonic mean of two numbers.
@@ -345,18 +1091,20 @@ def harmonic_mean(a: Union[int, float], b: Union[int, float]) -> Union[int, floa
     return (2 * a * b) / (a + b)
 
 
-def generate_edits(word: str, n: int = 1) -> List[str]:
+def generate_edits(word: str, n: int = 1) -> Set[str]:
     """
     Generate variations that are `n` edits away from word.
 
     Adapted from: https://norvig.com/spell-correct.html
 
+    For repeated lookups against a vocabulary, use `fns.spelling.SymSpell`.
+
     Args:
         word: Single word
         n: Number of edits away from word.
 
     Returns:
-        List of edits
+        Set of unique edits
     """
 
     def edits1(word: str):
@@ -370,5 +1118,5 @@ def generate_edits(word: str, n: int = 1) -> List[str]:
 
     edits = edits1(word)
     for i in range(n - 1):
-        edits = [e2 for e1 in edits for e2 in edits1(e1)]
+        edits = {e2 for e1 in edits for e2 in edits1(e1)}
     return edits
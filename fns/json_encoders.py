@@ -1,6 +1,16 @@
+import dataclasses
+import datetime
 import json
+import struct
+import sys
+import zipfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
 import numpy as np
 
+_native_types = (str, int, float, bool, type(None))
+
 
 class NpEncoder(json.JSONEncoder):
     """
@@ -16,3 +26,255 @@ class NpEncoder(json.JSONEncoder):
             return obj.tolist()
         else:
             return super(NpEncoder, self).default(obj)
+
+
+class ArrayEncoder(NpEncoder):
+    """
+    `NpEncoder` that hands arrays to `array_writer`, which can store them
+    elsewhere and return a reference to write in their place.
+
+    Usage:
+    ```python
+    json.dumps(data, cls=ArrayEncoder, array_writer=writer)
+    ```
+    """
+
+    def __init__(self, *args, array_writer: Optional[Callable] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.array_writer = array_writer
+
+    def default(self, obj):
+        if isinstance(obj, np.ndarray) and self.array_writer is not None:
+            reference = self.array_writer(obj)
+            if reference is not None:
+                return reference
+        return super().default(obj)
+
+
+class _ArraySidecar:
+    """
+    Store arrays of at least `threshold` bytes next to a JSON file, one
+    `.npy` per array or all of them in a single `.npz`.
+    """
+
+    def __init__(self, path: Path, threshold: int, sidecar: str):
+        if sidecar not in ("npy", "npz"):
+            raise ValueError("sidecar must be 'npy' or 'npz'")
+        self.path = path
+        self.threshold = threshold
+        self.sidecar = sidecar
+        self.arrays: Dict[str, np.ndarray] = {}
+
+    def __call__(self, array: np.ndarray) -> Optional[Dict]:
+        if array.nbytes < self.threshold or array.dtype.hasobject:
+            return None
+        name = f"arr_{len(self.arrays)}"
+        if self.sidecar == "npy":
+            filename = f"{self.path.stem}.{name}.npy"
+            np.save(self.path.parent / filename, array)
+            self.arrays[name] = array
+            reference = {"__ndarray__": filename}
+        else:
+            self.arrays[name] = array
+            reference = {"__ndarray__": f"{self.path.stem}.npz", "key": name}
+        reference.update(dtype=array.dtype.str, shape=list(array.shape))
+        return reference
+
+    def close(self) -> None:
+        if self.sidecar == "npz" and self.arrays:
+            np.savez(self.path.parent / f"{self.path.stem}.npz", **self.arrays)
+
+
+def _mmap_npz_member(path: Path, key: str) -> np.ndarray:
+    """
+    Memory-map an array stored uncompressed inside a `.npz` file.
+    """
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(f"{key}.npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        with np.load(path) as arrays:
+            return arrays[key]
+    with open(path, "rb") as f:
+        # The local file header has a fixed size of 30 bytes followed by the
+        # member name and an extra field whose lengths are in the header.
+        f.seek(info.header_offset)
+        name_length, extra_length = struct.unpack("<HH", f.read(30)[26:])
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    return np.memmap(
+        path,
+        dtype=dtype,
+        mode="r",
+        offset=offset,
+        shape=shape,
+        order="F" if fortran_order else "C",
+    )
+
+
+def write_json_sidecar(
+    item: Any,
+    path: Union[str, Path],
+    array_threshold: int = 1 << 16,
+    sidecar: str = "npy",
+    indent: Optional[int] = 2,
+) -> None:
+    """
+    Write an item to a JSON file, storing large NumPy arrays in binary
+    sidecar files.
+
+    Arrays of at least `array_threshold` bytes are saved to `<stem>.arr_<i>.npy`
+    files, or to a single `<stem>.npz`, next to the JSON file and replaced by
+    a reference with their dtype and shape. Smaller values are written
+    inline like `NpEncoder`, so the metadata stays human-readable.
+
+    Usage:
+    ```python
+    >>> item = {"name": "glove", "vectors": np.zeros((400_000, 300))}
+    >>> write_json_sidecar(item, "model.json")
+    >>> read_json_sidecar("model.json")["vectors"].shape
+    (400000, 300)
+    ```
+
+    Args:
+        item: JSON-serializable item, possibly holding NumPy arrays
+        path: Path of the JSON file
+        array_threshold: Minimum size in bytes of arrays stored in a sidecar
+        sidecar: "npy" for one file per array or "npz" for a single file
+        indent: Indentation of the JSON file
+
+    Returns:
+        None
+    """
+    path = Path(path)
+    writer = _ArraySidecar(path, array_threshold, sidecar)
+    with open(path, "w") as f:
+        json.dump(item, f, cls=ArrayEncoder, array_writer=writer, indent=indent)
+    writer.close()
+
+
+def read_json_sidecar(path: Union[str, Path], mmap: bool = True) -> Any:
+    """
+    Read a JSON file written by `write_json_sidecar`, loading the arrays of its
+    sidecar files.
+
+    Args:
+        path: Path of the JSON file
+        mmap: Memory-map the arrays instead of reading them into memory.
+            Memory-mapped arrays are read-only.
+
+    Returns:
+        Item with references replaced by NumPy arrays
+    """
+    path = Path(path)
+
+    def load_array(reference: Dict) -> Any:
+        if "__ndarray__" not in reference:
+            return reference
+        sidecar = path.parent / reference["__ndarray__"]
+        if "key" not in reference:
+            return np.load(sidecar, mmap_mode="r" if mmap else None)
+        if mmap:
+            return _mmap_npz_member(sidecar, reference["key"])
+        with np.load(sidecar) as arrays:
+            return arrays[reference["key"]]
+
+    with open(path) as f:
+        return json.load(f, object_hook=load_array)
+
+
+def _json_key(key: Any) -> str:
+    """
+    Convert a dictionary key the way `json.dumps` does.
+    """
+    if isinstance(key, np.generic):
+        key = key.item()
+    if isinstance(key, str):
+        return key
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, int):
+        return int.__repr__(key)
+    if isinstance(key, float):
+        return json.dumps(float(key))
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key)}")
+
+
+def to_native(obj: Any, json_keys: bool = True) -> Any:
+    """
+    Recursively convert numpy, pandas and other non-standard values to
+    basic Python types in a single pass.
+
+    Arrays are converted in bulk with `ndarray.tolist()`. Sets and tuples
+    become lists, dataclasses become dictionaries, dates become ISO strings,
+    durations become seconds and bytes are decoded as UTF-8.
+
+    Usage:
+    ```python
+    >>> to_native({"nums": np.array([1, 2]), 1: np.float32(0.5), "tags": {"a"}})
+    {'nums': [1, 2], '1': 0.5, 'tags': ['a']}
+    ```
+
+    Args:
+        obj: Value to convert
+        json_keys: Convert dictionary keys to strings like `json.dumps`
+
+    Returns:
+        Value made only of dict, list, str, int, float, bool and None
+    """
+    if type(obj) in _native_types:
+        return obj
+    if isinstance(obj, dict):
+        key = _json_key if json_keys else lambda k: to_native(k, json_keys)
+        return {key(k): to_native(v, json_keys) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return [
+            item if type(item) in _native_types else to_native(item, json_keys)
+            for item in obj
+        ]
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == "M":
+            obj = obj.astype("datetime64[us]")
+        elif obj.dtype.kind == "m":
+            seconds = obj / np.timedelta64(1, "s")
+            return np.where(np.isnat(obj), None, seconds).tolist()
+        elif obj.dtype.kind not in "OUS":
+            return obj.tolist()
+        return to_native(obj.tolist(), json_keys)
+    if isinstance(obj, (np.datetime64, np.timedelta64)):
+        # `item()` gives an int for nanosecond units
+        return to_native(np.asarray(obj), json_keys)
+    if isinstance(obj, np.generic):
+        return to_native(obj.item(), json_keys)
+    # Only check pandas types if pandas is already in use
+    pd = sys.modules.get("pandas")
+    if pd is not None:
+        if obj is pd.NaT:
+            return None
+        if isinstance(obj, (pd.Series, pd.Index)):
+            return to_native(obj.to_numpy(), json_keys)
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8")
+    if isinstance(obj, (str, int, float)):
+        # Subclasses such as np.float64 or enums
+        for native in (bool, int, float, str):
+            if isinstance(obj, native):
+                return native(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {
+            field.name: to_native(getattr(obj, field.name), json_keys)
+            for field in dataclasses.fields(obj)
+        }
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
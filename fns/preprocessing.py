@@ -1,9 +1,15 @@
-import json
+import hashlib
+import itertools
 import re
 import string
-from typing import Dict
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
-from fns.json_encoders import NpEncoder
+import pandas as pd
+
+from fns.cache import content_key, ResultCache
+from fns.fns import minibatch, parallel_map
+from fns.json_encoders import to_native
 
 # Compiled regular expressions
 _re_space = re.compile(r" {2,}")
@@ -12,6 +18,9 @@ _re_retweet = re.compile(r"^RT[\s]+")
 _re_hyperlink = re.compile(r"https?:\/\/.*[\r\n]*")
 _re_hyphen_word = re.compile("[a-zA-Z]+-[a-zA-Z]+")
 _re_comma = re.compile(r",{2,}")
+_re_separator = re.compile(r"[^a-zA-Z0-9\s]")
+
+_punctuation_table = str.maketrans("", "", string.punctuation)
 
 
 def combine_hyphenated_word(text: str) -> str:
@@ -129,8 +138,7 @@ def remove_separator(text: str) -> str:
     Returns:
 
     """
-    no_separator_regex = re.compile(r"[^a-zA-Z0-9\s]")
-    return no_separator_regex.sub("", text)
+    return _re_separator.sub("", text)
 
 
 def remove_punctuation(text: str) -> str:
@@ -141,14 +149,17 @@ def remove_punctuation(text: str) -> str:
         text: Sentence
 
     """
-    return "".join(t for t in text if t not in string.punctuation)
+    return text.translate(_punctuation_table)
 
 
 def normalize_json(json_data: Dict) -> Dict:
     """
     Convert any non-standard types in dictionary to basic types.
 
-    The normalization prevent errors during serialization.
+    The normalization prevent errors during serialization. The result is the
+    same as a `json.dumps`/`json.loads` round trip with `NpEncoder`, but
+    computed in one pass with `fns.json_encoders.to_native`, without
+    formatting and parsing every number.
 
     Usage:
     ```python
@@ -162,4 +173,263 @@ def normalize_json(json_data: Dict) -> Dict:
     Returns:
         Normalized dictionary
     """
-    return json.loads(json.dumps(json_data, cls=NpEncoder))
+    return to_native(json_data)
+
+
+class _Stage:
+    """
+    One pass over the text: a translate table, a regex substitution or a
+    plain function.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        payload,
+        replacement: str = "",
+        steps: Tuple[Callable, ...] = (),
+    ):
+        self.name = name
+        self.kind = kind
+        self.payload = payload
+        self.replacement = replacement
+        # Cleaners of this module merged into the stage, in order
+        self.steps = steps
+
+    def __call__(self, text: str) -> str:
+        if self.kind == "translate":
+            return text.translate(self.payload)
+        if self.kind == "sub":
+            return self.payload.sub(self.replacement, text)
+        return self.payload(text)
+
+    def apply(self, texts: List[str]) -> List[str]:
+        if self.kind == "translate":
+            table = self.payload
+            return [text.translate(table) for text in texts]
+        if self.kind == "sub":
+            sub, replacement = self.payload.sub, self.replacement
+            return [sub(replacement, text) for text in texts]
+        return [self.payload(text) for text in texts]
+
+    def can_fuse(self, other: "_Stage") -> bool:
+        if self.kind != other.kind:
+            return False
+        if self.kind == "translate":
+            # Deleting characters gives the same result in any order
+            return True
+        return self.kind == "sub" and all(
+            (first, second) in _fusable_regex_pairs
+            for first in self.steps
+            for second in other.steps
+        )
+
+    def fuse(self, other: "_Stage") -> "_Stage":
+        name = f"{self.name}+{other.name}"
+        steps = self.steps + other.steps
+        if self.kind == "translate":
+            table = {**self.payload, **other.payload}
+            return _Stage(name, "translate", table, steps=steps)
+        pattern = re.compile(
+            f"(?:{self.payload.pattern})|(?:{other.payload.pattern})",
+            self.payload.flags | other.payload.flags,
+        )
+        return _Stage(name, "sub", pattern, self.replacement, steps=steps)
+
+
+# How each cleaner of this module can be expressed as a fusable stage
+_fusable_steps = {
+    remove_hashtag: ("translate", str.maketrans("", "", "#"), ""),
+    remove_punctuation: ("translate", _punctuation_table, ""),
+    remove_retweet: ("sub", _re_retweet, ""),
+    remove_hyperlink: ("sub", _re_hyperlink, ""),
+    remove_separator: ("sub", _re_separator, ""),
+    remove_multiple_space: ("sub", _re_space, " "),
+    remove_multiple_commas: ("sub", _re_comma, ","),
+}
+
+# Ordered pairs of regex cleaners whose single-pass alternation gives the
+# same result as running them one after the other. A removal by one cleaner
+# can create or destroy a match of another, e.g. `remove_separator` breaks
+# up hyperlinks, so pairs are only listed when checked to be safe. Removing
+# a leading "RT " cannot affect hyperlinks, which do not depend on what
+# precedes them.
+_fusable_regex_pairs = {(remove_retweet, remove_hyperlink)}
+
+
+class TextPipeline:
+    """
+    Chain text cleaning steps and run them in as few passes as possible.
+
+    Consecutive character deletions (`remove_hashtag`, `remove_punctuation`)
+    are fused into a single `str.translate` table, and `remove_retweet`
+    followed by `remove_hyperlink` into a single regex. Fusion never changes
+    the result. Any other `str -> str` function is applied as is. Time spent
+    in each stage is accumulated in `timings`.
+
+    Pass `fuse=False` to run every step separately, e.g. to time it.
+
+    Usage:
+    ```python
+    >>> clean = TextPipeline([remove_retweet, remove_hyperlink, remove_hashtag])
+    >>> clean("RT #cool app https://t.co/x")
+    'cool app '
+    >>> clean.apply(["#a", "RT b"])
+    ['a', 'b']
+    ```
+    """
+
+    def __init__(self, steps: Sequence[Callable[[str], str]], fuse: bool = True):
+        """
+        Args:
+            steps: Functions applied in order, each taking and returning a text
+            fuse: Merge consecutive steps of this module into one pass
+        """
+        self.steps = list(steps)
+        self.stages: List[_Stage] = []
+        for step in self.steps:
+            name = getattr(step, "__name__", type(step).__name__)
+            if step in _fusable_steps:
+                kind, payload, replacement = _fusable_steps[step]
+                stage = _Stage(name, kind, payload, replacement, steps=(step,))
+            else:
+                stage = _Stage(name, "function", step)
+            if fuse and self.stages and self.stages[-1].can_fuse(stage):
+                self.stages[-1] = self.stages[-1].fuse(stage)
+            else:
+                self.stages.append(stage)
+        self.fingerprint = self._fingerprint(self.steps)
+        self.reset_timings()
+
+    @staticmethod
+    def _fingerprint(steps: Sequence[Callable[[str], str]]) -> str:
+        # Identify the steps, not the stages, since fusion never changes the
+        # result. The bytecode tells apart functions with the same name,
+        # e.g. two lambdas.
+        digest = hashlib.blake2b(digest_size=8)
+        for step in steps:
+            name = getattr(step, "__qualname__", type(step).__qualname__)
+            digest.update(f"{getattr(step, '__module__', '')}.{name}".encode())
+            code = getattr(step, "__code__", None)
+            if code is not None:
+                digest.update(code.co_code)
+                digest.update(repr((code.co_consts, code.co_names)).encode())
+        return digest.hexdigest()
+
+    def __call__(self, text: str) -> str:
+        for stage in self.stages:
+            text = stage(text)
+        return text
+
+    def _apply_batch(self, texts: List[str]) -> Tuple[List[str], List[float]]:
+        timings = []
+        for stage in self.stages:
+            start = time.perf_counter()
+            texts = stage.apply(texts)
+            timings.append(time.perf_counter() - start)
+        return texts, timings
+
+    def _split_cached(
+        self, batch: List[str], cache: ResultCache
+    ) -> Tuple[List[str], List[bytes], Dict[bytes, str], List[str]]:
+        keys = [content_key(text, self.fingerprint) for text in batch]
+        found = cache.get_many(keys)
+        misses = {}
+        for key, text in zip(keys, batch):
+            if key not in found:
+                misses.setdefault(key, text)
+        return batch, keys, found, misses
+
+    def apply(
+        self,
+        texts: Union[pd.Series, Iterable[str]],
+        batch_size: int = 10_000,
+        workers: Optional[int] = None,
+        cache: Optional[ResultCache] = None,
+    ) -> Union[pd.Series, List[str]]:
+        """
+        Clean many texts, stage by stage over batches.
+
+        Args:
+            texts: Series or iterable of texts
+            batch_size: Number of texts per batch
+            workers: Number of processes. Runs in the current process if None.
+            cache: Cache of cleaned texts. Only texts not seen before, by this
+                run or a previous one, are cleaned. Keys include the steps of
+                the pipeline, so pipelines can share a cache.
+
+        Returns:
+            Cleaned texts, as a Series with the same index if given a Series
+        """
+        batches = minibatch(texts, batch_size)
+        if cache is not None:
+            split, batches = itertools.tee(
+                self._split_cached(batch, cache) for batch in batches
+            )
+            batches = (list(misses.values()) for *_, misses in batches)
+        if workers:
+            results = parallel_map(
+                self._apply_batch, batches, workers=workers, executor="process"
+            )
+        else:
+            results = map(self._apply_batch, batches)
+
+        cleaned = []
+        for batch, timings in results:
+            for i, seconds in enumerate(timings):
+                self.timings[i] += seconds
+            if cache is not None:
+                _, keys, found, misses = next(split)
+                found.update(zip(misses, batch))
+                cache.set_many(dict(zip(misses, batch)))
+                batch = [found[key] for key in keys]
+            cleaned.extend(batch)
+        if isinstance(texts, pd.Series):
+            return pd.Series(cleaned, index=texts.index, name=texts.name)
+        return cleaned
+
+    def reset_timings(self) -> None:
+        """
+        Reset the time accumulated in each stage.
+        """
+        self.timings = [0.0] * len(self.stages)
+
+    def report(self) -> pd.DataFrame:
+        """
+        Get the time spent in each stage by `apply`.
+
+        Returns:
+            DataFrame with the seconds and percent of total time per stage
+        """
+        report = pd.DataFrame(
+            {"seconds": self.timings}, index=[stage.name for stage in self.stages]
+        )
+        total = report["seconds"].sum()
+        report["percent"] = report["seconds"] / total * 100 if total else 0.0
+        return report
+
+    def __repr__(self) -> str:
+        names = ", ".join(stage.name for stage in self.stages)
+        return f"TextPipeline([{names}])"
+
+
+def compose(*steps: Callable[[str], str], fuse: bool = True) -> TextPipeline:
+    """
+    Build a `TextPipeline` from cleaning functions.
+
+    Usage:
+    ```python
+    >>> clean = compose(remove_retweet, remove_hashtag, remove_multiple_space)
+    >>> clean("RT #good   day")
+    'good day'
+    ```
+
+    Args:
+        steps: Functions applied in order
+        fuse: Merge consecutive steps of this module into one pass
+
+    Returns:
+        TextPipeline
+    """
+    return TextPipeline(steps, fuse=fuse)
@@ -0,0 +1,260 @@
+import bisect
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+from fns.fns import read_pickle, write_pickle
+
+
+def edit_distance(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """
+    Compute the optimal string alignment (restricted Damerau-Levenshtein) distance.
+
+    Usage:
+    ```python
+    >>> edit_distance("hte", "the")
+    1
+    ```
+
+    Args:
+        a: First string
+        b: Second string
+        max_distance: Stop early and return `max_distance + 1` once exceeded.
+
+    Returns:
+        Number of insertions, deletions, substitutions and adjacent
+        transpositions needed to turn `a` into `b`
+    """
+    # Common prefixes and suffixes do not change the distance
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while (
+        end < len(a) - start
+        and end < len(b) - start
+        and a[len(a) - 1 - end] == b[len(b) - 1 - end]
+    ):
+        end += 1
+    a, b = a[start : len(a) - end], b[start : len(b) - end]
+
+    bound = max(len(a), len(b)) if max_distance is None else max_distance
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    if not a or not b:
+        return max(len(a), len(b))
+
+    # Only cells within `bound` of the diagonal can be at most `bound`, the
+    # others are left at `bound + 1`.
+    limit = bound + 1
+    previous_previous = None
+    previous = [min(j, limit) for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [limit] * (len(b) + 1)
+        current[0] = min(i, limit)
+        char = a[i - 1]
+        for j in range(max(1, i - bound), min(len(b), i + bound) + 1):
+            cost = 0 if char == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = min(value, limit)
+        if min(current) > bound:
+            return limit
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """
+    Generate all variants of a word with up to `max_distance` characters deleted.
+    """
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1 :] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+class SymSpell:
+    """
+    Spelling correction index based on the symmetric delete algorithm.
+
+    Deletes of every vocabulary word are precomputed once, so a lookup only
+    needs the deletes of the query instead of all `generate_edits` variants.
+
+    Reference: https://github.com/wolfgarbe/SymSpell
+
+    Usage:
+    ```python
+    >>> speller = SymSpell(max_distance=2).fit({"hello": 10, "help": 5})
+    >>> speller.lookup("helo")
+    [('hello', 1, 10), ('help', 1, 5)]
+    >>> speller.correct(["helo", "wrld"])
+    ['hello', 'wrld']
+    ```
+    """
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7):
+        """
+        Args:
+            max_distance: Maximum edit distance supported by the index
+            prefix_length: Only the first `prefix_length` characters of a word
+                are indexed, which bounds the index size for long words.
+        """
+        if prefix_length <= max_distance:
+            raise ValueError("prefix_length must be greater than max_distance")
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.words: Dict[str, int] = {}
+        self.deletes: Dict[str, List[str]] = {}
+
+    def fit(self, words: Union[Mapping[str, int], Iterable[str]]) -> "SymSpell":
+        """
+        Build the index from a vocabulary.
+
+        Args:
+            words: Dictionary of word to frequency, e.g. from
+                `fns.lexicon.onegram_count()`, or a list of words such as
+                `fns.lexicon.dict_words()`.
+
+        Returns:
+            The fitted index
+        """
+        if isinstance(words, Mapping):
+            counts = dict(words)
+        else:
+            counts = defaultdict(int)
+            for word in words:
+                counts[word] += 1
+        deletes = defaultdict(list)
+        for word in counts:
+            for variant in _deletes(word[: self.prefix_length], self.max_distance):
+                deletes[variant].append(word)
+        self.words = dict(counts)
+        self.deletes = dict(deletes)
+        return self
+
+    def lookup(
+        self, word: str, max_distance: Optional[int] = None, n: Optional[int] = None
+    ) -> List[Tuple[str, int, int]]:
+        """
+        Find vocabulary words within an edit distance of a word.
+
+        Args:
+            word: Word to correct
+            max_distance: Maximum edit distance. Defaults to the index's maximum.
+            n: Maximum number of suggestions to return
+
+        Returns:
+            List of (word, distance, frequency) sorted by distance and then
+            by decreasing frequency
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        if max_distance > self.max_distance:
+            raise ValueError(
+                f"max_distance cannot exceed the index's {self.max_distance}"
+            )
+        if n == 1 and word in self.words:
+            return [(word, 0, self.words[word])]
+
+        # Two words within distance d share a variant with at most d deletes
+        # from each of their prefixes. Variants of the query are visited by
+        # increasing number of deletes and, once n suggestions are found,
+        # the bound shrinks to the n-th best distance, which prunes both
+        # variants and candidates.
+        prefix = word[: self.prefix_length]
+        seen = set()
+        suggestions = []
+        distances: List[int] = []
+        variants = {prefix}
+        num_deletes = 0
+        while num_deletes <= max_distance and variants:
+            for variant in variants:
+                for candidate in self.deletes.get(variant, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    candidate_deletes = min(len(candidate), self.prefix_length) - len(
+                        variant
+                    )
+                    if (
+                        candidate_deletes > max_distance
+                        or abs(len(candidate) - len(word)) > max_distance
+                    ):
+                        continue
+                    distance = edit_distance(word, candidate, max_distance)
+                    if distance > max_distance:
+                        continue
+                    suggestions.append((candidate, distance, self.words[candidate]))
+                    if n:
+                        bisect.insort(distances, distance)
+                        if len(distances) >= n:
+                            max_distance = distances[n - 1]
+            num_deletes += 1
+            variants = {v[:i] + v[i + 1 :] for v in variants for i in range(len(v))}
+
+        suggestions = [s for s in suggestions if s[1] <= max_distance]
+        suggestions.sort(key=lambda s: (s[1], -s[2], s[0]))
+        return suggestions[:n] if n else suggestions
+
+    def correct(
+        self, tokens: Iterable[str], max_distance: Optional[int] = None
+    ) -> List[str]:
+        """
+        Replace each token with its best correction.
+
+        Repeated tokens are only looked up once. Tokens without any
+        suggestion are returned unchanged.
+
+        Args:
+            tokens: List of tokens
+            max_distance: Maximum edit distance
+
+        Returns:
+            List of corrected tokens
+        """
+        cache = {}
+        corrected = []
+        for token in tokens:
+            if token not in cache:
+                if token in self.words:
+                    cache[token] = token
+                else:
+                    suggestions = self.lookup(token, max_distance, n=1)
+                    cache[token] = suggestions[0][0] if suggestions else token
+            corrected.append(cache[token])
+        return corrected
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Save the index to disk.
+
+        Args:
+            path: File path
+
+        Returns:
+            None
+        """
+        write_pickle(self, path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "SymSpell":
+        """
+        Load an index saved with `save`.
+
+        Args:
+            path: File path
+
+        Returns:
+            SymSpell index
+        """
+        return read_pickle(path)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.words
@@ -1,10 +1,33 @@
+import array
+import contextlib
+import functools
 import hashlib
+import itertools
+import os
+import random
 import re
-from typing import List, Tuple, Union
+import tempfile
+from collections import Counter, deque
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+    Union,
+)
 
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import sparse
 
 
 def md5_hash(text: str) -> str:
@@ -33,51 +56,88 @@ def sha256hash(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
-def window(tokens, size: int = 3):
+def sliding_windows(array: np.ndarray, size: int) -> np.ndarray:
+    """
+    Get all windows of a 1D array as a read-only view without copying.
+
+    Args:
+        array: 1D NumPy array
+        size: Window size
+
+    Returns:
+        Array view of shape `(max(len(array) - size + 1, 0), size)`
+    """
+    if len(array) < size:
+        return np.empty((0, size), dtype=array.dtype)
+    return sliding_window_view(array, size)
+
+
+def window(tokens, size: int = 3, lazy: bool = False):
     """
     Generate samples for a window size.
 
+    For NumPy arrays, a tuple of `(windows, targets)` array views is returned
+    instead, without copying any tokens.
+
     Example:
     ```python
     >>> window(['a', 'b', 'c', 'd'], size=2)
     [(['a', 'b'], 'c'), (['b', 'c'], 'd')]
+    >>> window(np.array([1, 2, 3, 4]), size=2)
+    (array([[1, 2],
+           [2, 3]]), array([3, 4]))
     ```
 
     Args:
-        tokens: List of tokens
+        tokens: List of tokens or 1D NumPy array
         size: Window size
+        lazy: Return a generator instead of a list
 
     Returns:
         List of windowed samples
     """
-    return [
+    if isinstance(tokens, np.ndarray):
+        num_samples = max(len(tokens) - size, 0)
+        return sliding_windows(tokens, size)[:num_samples], tokens[size:]
+    samples = (
         (tokens[i : i + size], tokens[i + size])
         for i in range(0, len(tokens) - size, 1)
-    ]
+    )
+    return samples if lazy else list(samples)
 
 
-def offset_by_one(x, sequence_length: int = 3):
+def offset_by_one(x, sequence_length: int = 3, lazy: bool = False):
     """
     Generate a list of small sequences offset by 1.
 
+    For NumPy arrays, a tuple of `(inputs, targets)` array views is returned
+    instead, without copying any tokens.
+
     Usage:
 
     ```python
     >>> offset_by_one([1, 2, 3, 4, 5], sequence_length=3)
     [([1, 2, 3], [2, 3, 4])]
+    >>> offset_by_one(np.array([1, 2, 3, 4, 5]), sequence_length=3)
+    (array([[1, 2, 3]]), array([[2, 3, 4]]))
     ```
 
     Args:
-        x: Python list
+        x: Python list or 1D NumPy array
         sequence_length: Chunk size
+        lazy: Return a generator instead of a list
 
     Returns:
 
     """
     sl = sequence_length
-    return [
+    if isinstance(x, np.ndarray):
+        windows = sliding_windows(x, sl)
+        return windows[0 : len(x) - sl - 1 : sl], windows[1 : len(x) - sl : sl]
+    samples = (
         (x[i : i + sl], x[i + 1 : i + sl + 1]) for i in range(0, len(x) - sl - 1, sl)
-    ]
+    )
+    return samples if lazy else list(samples)
 
 
 def num_words(text: str) -> int:
@@ -103,7 +163,10 @@ def unique_chars(texts: List[str]) -> List[str]:
     Returns:
         A sorted list of unique characters
     """
-    return sorted(set("".join(texts)))
+    chars = set()
+    for text in texts:
+        chars.update(text)
+    return sorted(chars)
 
 
 def is_non_ascii(text: str) -> bool:
@@ -119,30 +182,169 @@ def is_non_ascii(text: str) -> bool:
     Returns:
         True if the text contains non-ascii characters.
     """
-    try:
-        text.encode("ascii")
-        return False
-    except UnicodeEncodeError:
-        return True
+    return not text.isascii()
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class PhraseMatcher:
+    """
+    Find phrases in texts with an Aho-Corasick automaton.
+
+    The automaton is built once and scans each text in a single pass, so the
+    cost does not grow with the number of phrases like a regex alternation.
+    Matches are leftmost-longest and do not overlap. Matchers can be pickled
+    to cache them across runs.
+
+    Usage:
+    ```python
+    >>> matcher = PhraseMatcher(["new york", "york"])
+    >>> matcher.find("I love New York")
+    [(7, 15)]
+    >>> matcher.find_all(["york city", "newyork"])
+    [[(0, 4)], []]
+    ```
+    """
+
+    def __init__(
+        self, phrases: List[str], ignore_case: bool = True, word_boundary: bool = True
+    ):
+        """
+        Args:
+            phrases: List of phrases
+            ignore_case: Match phrases case-insensitively
+            word_boundary: Only match phrases that start and end at a word
+                boundary, like `\\b` in regular expressions
+        """
+        self.ignore_case = ignore_case
+        self.word_boundary = word_boundary
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Lengths of all phrases ending at each node, longest first
+        self._outputs: List[Tuple[int, ...]] = [()]
+
+        for phrase in phrases:
+            if not phrase:
+                continue
+            # Normalize phrases exactly like texts so that they can match
+            phrase = self._normalize(phrase)
+            node = 0
+            for char in phrase:
+                if char not in self._goto[node]:
+                    self._goto[node][char] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append(())
+                node = self._goto[node][char]
+            self._outputs[node] = (len(phrase),)
+
+        # Breadth-first traversal so failure links of shallower nodes are known
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._outputs[child] += self._outputs[self._fail[child]]
+                queue.append(child)
+
+    def _normalize(self, text: str) -> str:
+        if not self.ignore_case:
+            return text
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            return lowered
+        # A few characters lowercase to several, which would shift offsets
+        return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+    def _is_boundary(self, text: str, position: int) -> bool:
+        before = position > 0 and _is_word_char(text[position - 1])
+        after = position < len(text) and _is_word_char(text[position])
+        return before != after
+
+    def find(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Find span positions of phrases in a text.
+
+        Args:
+            text: Sentence
+
+        Returns:
+            List of (start, end) spans
+        """
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        longest = {}
+        node = 0
+        for end, char in enumerate(self._normalize(text), 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length in outputs[node]:
+                start = end - length
+                if self.word_boundary and not (
+                    self._is_boundary(text, start) and self._is_boundary(text, end)
+                ):
+                    continue
+                if longest.get(start, 0) < end:
+                    longest[start] = end
+
+        spans = []
+        position = 0
+        for start in sorted(longest):
+            if start >= position:
+                spans.append((start, longest[start]))
+                position = longest[start]
+        return spans
+
+    def find_all(self, texts: Iterable[str]) -> List[List[Tuple[int, int]]]:
+        """
+        Find span positions of phrases in a batch of texts.
+
+        Args:
+            texts: List of sentences
 
+        Returns:
+            List of spans for each text
+        """
+        return [self.find(text) for text in texts]
 
-def span_positions(text: str, phrases: List[str]) -> List[Tuple[int, int]]:
+
+@functools.lru_cache(maxsize=32)
+def _phrase_regex(phrases: Tuple[str, ...]) -> Pattern:
+    capture_group = "|".join([re.escape(phrase) for phrase in phrases])
+    return re.compile(rf"\b({capture_group})\b", flags=re.IGNORECASE)
+
+
+def span_positions(
+    text: str, phrases: Union[List[str], PhraseMatcher]
+) -> List[Tuple[int, int]]:
     """
     Find span position of phrases in a text.
 
+    For large phrase lists or many texts, build a `PhraseMatcher` once and
+    pass it as `phrases`.
+
     Args:
         text: Sentence
-        phrases: List of phrases
+        phrases: List of phrases or a PhraseMatcher
 
     Returns:
         List of span positions for each phrase.
         The span position is a tuple of start and end index.
     """
-    capture_group = "|".join([re.escape(phrase) for phrase in phrases])
-    reg = re.compile(rf"\b({capture_group})\b", flags=re.IGNORECASE)
+    if isinstance(phrases, PhraseMatcher):
+        return phrases.find(text)
+    reg = _phrase_regex(tuple(phrases))
     return [match.span() for match in reg.finditer(text)]
 
 
+_re_abbreviation = re.compile(r"\b[A-Z][A-Z]+\b")
+
+
 def extract_abbreviations(texts: List[str]) -> List[str]:
     """
     Get a list of all-capitalized words.
@@ -155,60 +357,362 @@ def extract_abbreviations(texts: List[str]) -> List[str]:
     Returns:
         List of abbreviations
     """
-    combined_text = "\n".join(texts)
-    symbols = re.findall(r"\b[A-Z][A-Z]+\b", combined_text)
-    return list(set(symbols))
+    symbols = set()
+    for text in texts:
+        symbols.update(_re_abbreviation.findall(text))
+    return list(symbols)
+
+
+def _num_words_chunk(texts: List[str]) -> List[int]:
+    return [len(text.split()) for text in texts]
+
+
+def _is_non_ascii_chunk(texts: List[str]) -> List[bool]:
+    return [not text.isascii() for text in texts]
+
+
+def _abbreviations_chunk(texts: List[str]) -> List[Set[str]]:
+    return [set(_re_abbreviation.findall(text)) for text in texts]
+
+
+def _map_chunks(
+    func: Callable[[List[str]], List],
+    texts: Union[pd.Series, Iterable[str]],
+    workers: Optional[int],
+    chunk_size: int,
+) -> List:
+    """
+    Apply a function over a list of texts, in chunks on a process pool if
+    `workers` is given.
+    """
+    texts = texts.tolist() if isinstance(texts, (pd.Series, np.ndarray)) else texts
+    if not workers:
+        return func(list(texts))
+    from fns.fns import minibatch, parallel_map
+
+    chunks = minibatch(texts, chunk_size)
+    results = parallel_map(func, chunks, workers=workers, executor="process")
+    return list(itertools.chain.from_iterable(results))
+
+
+def num_words_batch(
+    texts: Union[pd.Series, Iterable[str]],
+    workers: Optional[int] = None,
+    chunk_size: int = 100_000,
+) -> np.ndarray:
+    """
+    Count words of many texts, using whitespace as delimiter.
+
+    Faster than `df[column].apply(num_words)` and can be spread over
+    processes. See `benchmarks/text_stats.py`.
+
+    Args:
+        texts: Series, array or list of sentences
+        workers: Number of processes. Only worth it for millions of rows.
+        chunk_size: Number of texts sent to a process at a time
+
+    Returns:
+        Array of word counts
+    """
+    counts = _map_chunks(_num_words_chunk, texts, workers, chunk_size)
+    return np.array(counts, dtype=np.int64)
+
+
+def is_non_ascii_batch(
+    texts: Union[pd.Series, Iterable[str]],
+    workers: Optional[int] = None,
+    chunk_size: int = 100_000,
+) -> np.ndarray:
+    """
+    Check which texts have non-ascii characters.
+
+    Args:
+        texts: Series, array or list of sentences
+        workers: Number of processes. Only worth it for millions of rows.
+        chunk_size: Number of texts sent to a process at a time
+
+    Returns:
+        Boolean mask, True for texts with non-ascii characters
+    """
+    mask = _map_chunks(_is_non_ascii_chunk, texts, workers, chunk_size)
+    return np.array(mask, dtype=bool)
+
+
+def abbreviations_batch(
+    texts: Union[pd.Series, Iterable[str]],
+    workers: Optional[int] = None,
+    chunk_size: int = 100_000,
+) -> np.ndarray:
+    """
+    Get the set of all-capitalized words of each text.
+
+    Args:
+        texts: Series, array or list of sentences
+        workers: Number of processes. Only worth it for millions of rows.
+        chunk_size: Number of texts sent to a process at a time
+
+    Returns:
+        Object array with a set of abbreviations per text
+    """
+    abbreviations = _map_chunks(_abbreviations_chunk, texts, workers, chunk_size)
+    result = np.empty(len(abbreviations), dtype=object)
+    result[:] = abbreviations
+    return result
+
+
+def _format_fasttext_lines(
+    preprocess: Optional[Callable[[str], str]],
+    rows: List[Tuple[str, Union[str, List[str]]]],
+) -> List[str]:
+    lines = []
+    for text, text_label in rows:
+        if type(text_label) is str:
+            text_label = [text_label]
+        label_str = " ".join([f"__label__{label}" for label in text_label])
+        if preprocess is not None:
+            text = preprocess(text)
+        lines.append(f"{label_str} {text}\n")
+    return lines
+
+
+def _external_shuffle(
+    lines: Iterable[str], rng: random.Random, directory: str, num_buckets: int
+) -> Iterator[str]:
+    """
+    Shuffle lines with memory proportional to `1 / num_buckets` of the data.
+
+    Lines are scattered into random bucket files which are then shuffled
+    one at a time in memory.
+    """
+    paths = [os.path.join(directory, f"bucket-{i}.txt") for i in range(num_buckets)]
+    buckets = [open(path, "w", buffering=1 << 16) for path in paths]
+    try:
+        for line in lines:
+            buckets[rng.randrange(num_buckets)].write(line)
+    finally:
+        for bucket in buckets:
+            bucket.close()
+    for path in paths:
+        with open(path) as fp:
+            bucket_lines = fp.readlines()
+        os.remove(path)
+        rng.shuffle(bucket_lines)
+        yield from bucket_lines
 
 
 def export_fasttext_format(
-    texts: List[str], labels: Union[List[str], List[List[str]]], filename
-) -> None:
+    texts: Iterable[str],
+    labels: Iterable[Union[str, List[str]]],
+    filename,
+    shards: Optional[int] = None,
+    validation_split: Optional[float] = None,
+    shuffle: bool = False,
+    seed: Optional[int] = None,
+    preprocess: Optional[Callable[[str], str]] = None,
+    workers: Optional[int] = None,
+    batch_size: int = 10_000,
+    shuffle_buckets: int = 64,
+) -> List[str]:
     """
     Export training data to a fasttext compatible format.
 
+    Lines are written in blocks as they are produced, so texts and labels
+    can be iterators larger than memory.
+
     Format:
     __label__POSITIVE it was good
 
+    Usage:
+    ```python
+    >>> export_fasttext_format(
+    ...     texts, labels, "train.txt", validation_split=0.1, shuffle=True,
+    ...     preprocess=remove_hyperlink, workers=8,
+    ... )
+    ['train.txt', 'train.valid.txt']
+    ```
+
     Args:
-        texts: List of sentences
-        labels: List of single or multi-label classes
+        texts: List or iterator of sentences
+        labels: List or iterator of single or multi-label classes
         filename: Exported filename
+        shards: Split the output round-robin into this many files named
+            like `train.0.txt`, `train.1.txt`, ...
+        validation_split: Fraction of lines randomly written to a separate
+            validation file named like `train.valid.txt`
+        shuffle: Shuffle lines on disk before writing them
+        seed: Random seed for shuffling and the validation split
+        preprocess: Function applied to each text before writing,
+            e.g. a cleaner from `fns.preprocessing`
+        workers: Run `preprocess` in a process pool with this many workers.
+            `preprocess` must then be picklable.
+        batch_size: Number of lines formatted and written at a time
+        shuffle_buckets: Number of temporary files used for shuffling.
+            Peak memory is about the output size divided by this number.
 
     Returns:
-        None
+        List of written file paths
     """
-    output = []
-    for text, text_label in zip(texts, labels):
-        if type(text_label) is str:
-            text_label = [text_label]
-        labels = " ".join([f"__label__{label}" for label in text_label])
-        output.append(f"{labels} {text}\n")
-    with open(filename, "w") as fp:
-        fp.writelines(output)
+    from fns.fns import minibatch, parallel_map
 
+    path = Path(filename)
+    train_paths = [str(path)]
+    if shards:
+        train_paths = [
+            str(path.with_name(f"{path.stem}.{i}{path.suffix}")) for i in range(shards)
+        ]
+    valid_path = str(path.with_name(f"{path.stem}.valid{path.suffix}"))
 
-def extract_tfidf_keywords(texts: List[str], ngram: int = 2, n: int = 10) -> List[str]:
+    format_lines = functools.partial(_format_fasttext_lines, preprocess)
+    rows = minibatch(zip(texts, labels), batch_size)
+    if workers:
+        batches = parallel_map(format_lines, rows, workers=workers, executor="process")
+    else:
+        batches = map(format_lines, rows)
+    lines = itertools.chain.from_iterable(batches)
+
+    rng = random.Random(seed)
+    with contextlib.ExitStack() as stack:
+        if shuffle:
+            directory = stack.enter_context(
+                tempfile.TemporaryDirectory(dir=path.parent)
+            )
+            lines = _external_shuffle(lines, rng, directory, shuffle_buckets)
+        train_files = [
+            stack.enter_context(open(p, "w", buffering=1 << 20)) for p in train_paths
+        ]
+        valid_file = None
+        if validation_split:
+            valid_file = stack.enter_context(open(valid_path, "w", buffering=1 << 20))
+
+        num_train = 0
+        for line in lines:
+            if valid_file is not None and rng.random() < validation_split:
+                valid_file.write(line)
+            else:
+                train_files[num_train % len(train_files)].write(line)
+                num_train += 1
+
+    return train_paths + ([valid_path] if validation_split else [])
+
+
+def _feature_names(vectorizer) -> np.ndarray:
+    if hasattr(vectorizer, "get_feature_names_out"):
+        return np.asarray(vectorizer.get_feature_names_out())
+    return np.array(vectorizer.get_feature_names())
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Get indices of the k highest scores in decreasing order of score.
+    """
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def _streaming_term_tfidf(
+    chunks: Callable[[], Iterable[List[str]]], params: Dict
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute mean tf-idf term scores in two passes over chunks of texts.
+
+    The scores match `TfidfVectorizer(sublinear_tf=True, **params)`.
+    """
+    document_frequency = Counter()
+    num_documents = 0
+    for chunk in chunks():
+        counter = CountVectorizer(binary=True, **params)
+        try:
+            vectors = counter.fit_transform(chunk)
+        except ValueError as error:
+            # Every text in the chunk is empty or made of stop words
+            if "empty vocabulary" not in str(error):
+                raise
+            num_documents += len(chunk)
+            continue
+        num_documents += vectors.shape[0]
+        chunk_frequency = np.asarray(vectors.sum(axis=0)).ravel()
+        document_frequency.update(
+            dict(zip(_feature_names(counter).tolist(), chunk_frequency.tolist()))
+        )
+
+    terms = np.array(sorted(document_frequency))
+    frequency = np.array([document_frequency[term] for term in terms])
+    idf = np.log((1 + num_documents) / (1 + frequency)) + 1
+    vocabulary = {term: i for i, term in enumerate(terms.tolist())}
+
+    total_tfidf = np.zeros(len(terms))
+    counter = CountVectorizer(vocabulary=vocabulary, **params)
+    for chunk in chunks():
+        vectors = counter.transform(chunk).astype(np.float64)
+        vectors.data = 1 + np.log(vectors.data)
+        vectors = normalize(vectors.multiply(idf).tocsr())
+        total_tfidf += np.asarray(vectors.sum(axis=0)).ravel()
+    return terms, total_tfidf / max(num_documents, 1)
+
+
+def extract_tfidf_keywords(
+    texts: Union[List[str], Iterable[List[str]], Callable],
+    ngram: int = 2,
+    n: int = 10,
+    streaming: bool = False,
+) -> List[str]:
     """
     Get top keywords based on mean tf-idf term score.
 
+    Scores are averaged on the sparse tf-idf matrix, so it is never densified.
+    With `streaming=True`, `texts` is consumed as chunks of texts in two
+    passes (document frequencies, then scores), so only the vocabulary and
+    one chunk need to fit in memory.
+
+    Usage:
+    ```python
+    >>> def chunks():
+    ...     return iter_jsonl("corpus.jsonl", batch_size=10_000)
+    >>> extract_tfidf_keywords(chunks, streaming=True)
+    ```
+
     Args:
-        texts: List of sentences
+        texts: List of sentences. With `streaming`, a re-iterable of lists of
+            sentences or a function returning a fresh iterator of them. A
+            one-shot iterator raises a TypeError, as texts are read twice.
         ngram: 1 for words, 2 for bigram and so on.
         n: Number of keywords to extract
+        streaming: Process texts chunk by chunk
 
     Returns:
         Keywords
     """
-    tfidf = TfidfVectorizer(
+    params = dict(
         ngram_range=(1, ngram),
         stop_words="english",
         strip_accents="unicode",
-        sublinear_tf=True,
     )
-    vectors = tfidf.fit_transform(texts)
-    term_tfidf = vectors.A.mean(axis=0)
-    terms = np.array(tfidf.get_feature_names())
-    return terms[term_tfidf.argsort()[::-1]][:n].tolist()
+    if streaming:
+        if not callable(texts) and iter(texts) is texts:
+            raise TypeError(
+                "streaming needs two passes over the chunks: pass a list or a "
+                "function returning a fresh iterator instead of an iterator"
+            )
+        chunks = texts if callable(texts) else lambda: iter(texts)
+        terms, term_tfidf = _streaming_term_tfidf(chunks, params)
+    else:
+        tfidf = TfidfVectorizer(sublinear_tf=True, **params)
+        vectors = tfidf.fit_transform(texts)
+        term_tfidf = np.asarray(vectors.mean(axis=0)).ravel()
+        terms = _feature_names(tfidf)
+    return terms[_top_k(term_tfidf, n)].tolist()
+
+
+def _row_top_k(
+    matrix: sparse.csr_matrix, row: int, k: int, terms: np.ndarray
+) -> List[Optional[str]]:
+    start, end = matrix.indptr[row], matrix.indptr[row + 1]
+    top = _top_k(matrix.data[start:end], k)
+    keywords = terms[matrix.indices[start:end][top]].tolist()
+    return keywords + [None] * (k - len(keywords))
 
 
 def extract_discriminative_keywords(
@@ -217,38 +721,356 @@ def extract_discriminative_keywords(
     text_column: str,
     ngram: int = 2,
     n: int = 10,
+    vectorizer: Optional[TfidfVectorizer] = None,
 ) -> pd.DataFrame:
     """
     Generate discriminative keywords for texts in each category.
 
+    The top-n terms are selected on the sparse tf-idf matrix, one category
+    row at a time, without densifying it.
+
     Args:
         df: Dataframe with text and category columns.
         text_column: Column name containing texts
         category_column: Column name for the text category
         ngram: 1 for words, 2 for bigram and so on.
         n: Number of keywords to return.
+        vectorizer: TfidfVectorizer to use instead of the default one. It is
+            fitted on the first call and only used to transform afterwards,
+            so repeated calls on the same frame don't refit.
 
     Returns:
         Dataframe with categories in columns and top-n keywords in each columns.
+        Categories with fewer than n terms are padded with None.
     """
     # Combine all texts into a single document for each category
     category_docs = df.groupby(by=category_column)[text_column].apply(" ".join)
     categories = category_docs.index.tolist()
 
-    tfidf = TfidfVectorizer(
-        ngram_range=(1, ngram),
-        stop_words="english",
-        strip_accents="unicode",
-        sublinear_tf=True,
+    if vectorizer is None:
+        vectorizer = TfidfVectorizer(
+            ngram_range=(1, ngram),
+            stop_words="english",
+            strip_accents="unicode",
+            sublinear_tf=True,
+        )
+    if hasattr(vectorizer, "vocabulary_"):
+        document_vectors = vectorizer.transform(category_docs)
+    else:
+        document_vectors = vectorizer.fit_transform(category_docs)
+    document_vectors = sparse.csr_matrix(document_vectors)
+    keywords = _feature_names(vectorizer)
+
+    top_terms = [
+        _row_top_k(document_vectors, row, k=n, terms=keywords)
+        for row in range(len(categories))
+    ]
+    return pd.DataFrame(
+        dict(zip(categories, top_terms)), columns=categories, dtype=object
     )
-    document_vectors = tfidf.fit_transform(category_docs).A
-    keywords = np.array(tfidf.get_feature_names())
-    top_terms = document_vectors.argsort(axis=1)[:, :n]
-    return pd.DataFrame(keywords[top_terms].T, columns=categories)
+
+
+class DocumentFrequency:
+    """
+    Incrementally count the number of documents containing each word.
+
+    Memory is proportional to the vocabulary only. Counts from different
+    shards or workers can be combined with `merge`.
+
+    Usage:
+    ```python
+    >>> frequency = DocumentFrequency()
+    >>> for shard in shards:
+    ...     frequency.partial_fit(shard)
+    >>> frequency.stopwords(top_n=100)
+    ```
+    """
+
+    def __init__(self, analyzer: Optional[Callable[[str], List[str]]] = None):
+        """
+        Args:
+            analyzer: Function splitting a text into words. Defaults to the
+                lowercasing word tokenizer of `TfidfVectorizer`.
+        """
+        self.analyzer = analyzer
+        self.counts = Counter()
+        self.num_documents = 0
+
+    def partial_fit(self, texts: Iterable[str]) -> "DocumentFrequency":
+        """
+        Count words of a batch of texts.
+
+        Args:
+            texts: List of sentences
+
+        Returns:
+            self
+        """
+        analyze = self.analyzer or _default_analyzer()
+        for text in texts:
+            self.counts.update(set(analyze(text)))
+            self.num_documents += 1
+        return self
+
+    def merge(self, other: "DocumentFrequency") -> "DocumentFrequency":
+        """
+        Add counts from another DocumentFrequency.
+
+        Args:
+            other: DocumentFrequency fitted on other texts
+
+        Returns:
+            self
+        """
+        self.counts.update(other.counts)
+        self.num_documents += other.num_documents
+        return self
+
+    def idf(self) -> pd.DataFrame:
+        """
+        Compute smoothed inverse document frequencies like `TfidfVectorizer`.
+
+        Returns:
+            Dataframe with word and idf columns sorted by idf
+        """
+        words = sorted(self.counts)
+        frequency = np.array([self.counts[word] for word in words], dtype=np.float64)
+        idf = np.log((1 + self.num_documents) / (1 + frequency)) + 1
+        return pd.DataFrame({"word": words, "idf": idf}).sort_values(by="idf")
+
+    def stopwords(
+        self, threshold: Optional[float] = None, top_n: Optional[int] = None
+    ) -> List[str]:
+        """
+        Get the most frequent words across documents.
+
+        Args:
+            threshold: Minimum fraction of documents a word must appear in
+            top_n: Maximum number of words to return
+
+        Returns:
+            Words sorted by decreasing document frequency
+        """
+        words = self.counts.most_common(top_n)
+        if threshold is not None:
+            min_count = threshold * self.num_documents
+            words = [(word, count) for word, count in words if count >= min_count]
+        return [word for word, _ in words]
+
+
+@functools.lru_cache(maxsize=1)
+def _default_analyzer() -> Callable[[str], List[str]]:
+    return TfidfVectorizer().build_analyzer()
 
 
 def extract_stopwords(texts: List[str]) -> pd.DataFrame:
-    vec = TfidfVectorizer()
-    vec.fit(texts)
-    word_idf_pairs = zip(vec.get_feature_names(), vec.idf_)
-    return pd.DataFrame(word_idf_pairs, columns=["word", "idf"]).sort_values(by="idf")
+    """
+    Get words sorted by increasing inverse document frequency.
+
+    Args:
+        texts: List of sentences
+
+    Returns:
+        Dataframe with word and idf columns. Words at the top are
+        stopword candidates.
+    """
+    return DocumentFrequency().partial_fit(texts).idf()
+
+
+class Vocabulary:
+    """
+    Map word or character tokens to integer ids.
+
+    Encoded batches use a ragged layout: one flat `int32` array of ids plus
+    `int64` offsets where text `i` is `ids[offsets[i]:offsets[i + 1]]`, so
+    no Python object is kept per token.
+
+    Usage:
+    ```python
+    >>> vocab = Vocabulary(level="word", min_count=2).fit(texts)
+    >>> ids, offsets = vocab.encode(["hello world"])
+    >>> vocab.decode(ids, offsets)
+    ['hello <unk>']
+    ```
+    """
+
+    def __init__(
+        self,
+        level: str = "word",
+        min_count: int = 1,
+        max_size: Optional[int] = None,
+        specials: Tuple[str, ...] = ("<pad>", "<unk>"),
+        unk_token: Optional[str] = "<unk>",
+    ):
+        """
+        Args:
+            level: "word" to split on whitespace or "char" for characters
+            min_count: Minimum number of occurrences to keep a token
+            max_size: Maximum number of tokens kept, excluding specials
+            specials: Tokens placed first in the vocabulary
+            unk_token: Token used for unknown tokens. Must be in `specials`.
+                If None, unknown tokens are dropped when encoding.
+        """
+        if level not in ("word", "char"):
+            raise ValueError(f"level must be 'word' or 'char', got {level!r}")
+        if unk_token is not None and unk_token not in specials:
+            raise ValueError("unk_token must be one of the specials")
+        self.level = level
+        self.min_count = min_count
+        self.max_size = max_size
+        self.specials = tuple(specials)
+        self.unk_token = unk_token
+        self.counts = Counter()
+        self.itos: List[str] = list(self.specials)
+        self.stoi: Dict[str, int] = {token: i for i, token in enumerate(self.itos)}
+
+    def _tokenize(self, text: str) -> Iterable[str]:
+        return text if self.level == "char" else text.split()
+
+    def update(self, texts: Iterable[str]) -> "Vocabulary":
+        """
+        Count tokens of a batch of texts without rebuilding the vocabulary.
+
+        Args:
+            texts: List or iterator of sentences
+
+        Returns:
+            self
+        """
+        for text in texts:
+            self.counts.update(self._tokenize(text))
+        return self
+
+    def build(self) -> "Vocabulary":
+        """
+        Build the vocabulary from the counted tokens.
+
+        Tokens are ordered by decreasing count, then alphabetically.
+
+        Returns:
+            self
+        """
+        tokens = [
+            (token, count)
+            for token, count in self.counts.items()
+            if count >= self.min_count and token not in self.specials
+        ]
+        tokens.sort(key=lambda item: (-item[1], item[0]))
+        self.itos = list(self.specials) + [t for t, _ in tokens[: self.max_size]]
+        self.stoi = {token: i for i, token in enumerate(self.itos)}
+        return self
+
+    def fit(self, texts: Iterable[str]) -> "Vocabulary":
+        """
+        Count tokens of texts and build the vocabulary.
+
+        Args:
+            texts: List or iterator of sentences
+
+        Returns:
+            self
+        """
+        return self.update(texts).build()
+
+    def encode(self, texts: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Encode texts into a flat array of ids and offsets.
+
+        Args:
+            texts: List or iterator of sentences
+
+        Returns:
+            Tuple of `int32` ids and `int64` offsets of length `len(texts) + 1`
+        """
+        stoi = self.stoi
+        unk_id = stoi.get(self.unk_token)
+        ids = array.array("i")
+        offsets = array.array("q", [0])
+        for text in texts:
+            if unk_id is None:
+                ids.extend([stoi[t] for t in self._tokenize(text) if t in stoi])
+            else:
+                ids.extend([stoi.get(t, unk_id) for t in self._tokenize(text)])
+            offsets.append(len(ids))
+        return (
+            np.frombuffer(ids, dtype=np.int32),
+            np.frombuffer(offsets, dtype=np.int64),
+        )
+
+    def decode(self, ids: np.ndarray, offsets: np.ndarray) -> List[str]:
+        """
+        Decode ids and offsets from `encode` back to texts.
+
+        Args:
+            ids: Flat array of ids
+            offsets: Offsets of each text in `ids`
+
+        Returns:
+            List of texts
+        """
+        separator = "" if self.level == "char" else " "
+        tokens = np.array(self.itos, dtype=object)[ids]
+        return [
+            separator.join(tokens[start:end])
+            for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())
+        ]
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Save the vocabulary as a `.npz` file holding a single UTF-8 blob.
+
+        Args:
+            path: File path
+
+        Returns:
+            None
+        """
+        encoded = [token.encode("utf-8") for token in self.itos]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        np.savez(
+            path,
+            blob=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            offsets=np.concatenate([[0], np.cumsum(lengths)]),
+            num_specials=len(self.specials),
+            level=self.level,
+            unk_token=self.unk_token or "",
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Vocabulary":
+        """
+        Load a vocabulary saved with `save`.
+
+        Token counts are not saved, so the loaded vocabulary cannot be rebuilt.
+
+        Args:
+            path: File path
+
+        Returns:
+            Vocabulary
+        """
+        with np.load(path) as data:
+            blob = data["blob"].tobytes()
+            offsets = data["offsets"].tolist()
+            itos = [
+                blob[start:end].decode("utf-8")
+                for start, end in zip(offsets[:-1], offsets[1:])
+            ]
+            num_specials = int(data["num_specials"])
+            vocabulary = cls(
+                level=str(data["level"]),
+                specials=tuple(itos[:num_specials]),
+                unk_token=str(data["unk_token"]) or None,
+            )
+        vocabulary.itos = itos
+        vocabulary.stoi = {token: i for i, token in enumerate(itos)}
+        return vocabulary
+
+    def __len__(self) -> int:
+        return len(self.itos)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.stoi
+
+    def __getitem__(self, token: str) -> int:
+        return self.stoi[token]
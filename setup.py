@@ -19,5 +19,6 @@ setup(
     author_email="meamitkc@gmail.com",
     url="https://github.com/amitness/fns",
     install_requires=["numpy"],
+    extras_require={"ijson": ["ijson"]},
     packages=find_packages(),
 )
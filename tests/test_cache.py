@@ -0,0 +1,68 @@
+import subprocess
+import sys
+
+from fns.cache import cached, content_key, ResultCache
+from fns.preprocessing import compose, remove_hashtag, remove_retweet
+
+
+def test_cached(tmp_path):
+    calls = []
+
+    @cached(maxsize=2, path=tmp_path / "cache.sqlite")
+    def clean(text):
+        calls.append(text)
+        return text.lower()
+
+    assert [clean(t) for t in ["A", "B", "A", "C", "A"]] == list("abaca")
+    assert calls == ["A", "B", "C"]
+    assert clean.cache.stats()["hits"] == 2
+    clean.cache.close()
+
+    # A new cache on the same file answers from disk
+    cache = ResultCache(path=tmp_path / "cache.sqlite", namespace=clean.cache.namespace)
+    assert cache.get(content_key("B")) == "b"
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get(content_key("D")) is None
+    cache.close()
+
+
+def test_pipeline_cache():
+    cache = ResultCache()
+    clean = compose(remove_retweet, remove_hashtag)
+    texts = ["RT #a", "b", "RT #a", "c"]
+    assert clean.apply(texts, batch_size=3, cache=cache) == ["a", "b", "a", "c"]
+    assert clean.apply(texts, cache=cache) == ["a", "b", "a", "c"]
+    assert cache.stats()["misses"] == 3
+    assert cache.stats()["hits"] == 3
+
+
+def test_pipelines_share_cache(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    texts = ["RT #a b", "RT #a b"]
+    with ResultCache(path=path) as cache:
+        assert compose(remove_retweet).apply(texts, cache=cache) == ["#a b"] * 2
+        assert compose(remove_hashtag).apply(texts, cache=cache) == ["RT a b"] * 2
+        upper = compose(lambda text: text.upper())
+        lower = compose(lambda text: text.lower())
+        assert upper.apply(texts, cache=cache) == ["RT #A B"] * 2
+        assert lower.apply(texts, cache=cache) == ["rt #a b"] * 2
+    with ResultCache(path=path) as cache:
+        assert compose(remove_hashtag).apply(texts, cache=cache) == ["RT a b"] * 2
+        assert cache.stats()["disk_hits"] == 1
+
+
+def test_cached_commits_at_exit(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    script = f"""
+from fns.cache import cached
+
+@cached(path={str(path)!r})
+def clean(text):
+    return text.lower()
+
+clean("A")
+"""
+    subprocess.run([sys.executable, "-c", script], check=True)
+    cache = ResultCache(path=path, namespace="__main__.clean")
+    assert cache.get(content_key("A")) == "a"
+    cache.close()
@@ -0,0 +1,51 @@
+import pickle
+import random
+from collections import Counter
+
+import numpy as np
+
+from fns import top, sort_dict_by_value, percent_dict, top_n_from_dict
+from fns.counting import CompactCounter, SpaceSaving
+
+
+def test_space_saving():
+    rng = random.Random(0)
+    stream = ["a"] * 500 + ["b"] * 300 + ["c"] * 200
+    stream += [str(rng.random()) for _ in range(2000)]
+    rng.shuffle(stream)
+
+    counter = SpaceSaving(capacity=50)
+    counter.update(stream)
+    assert len(counter) == 50
+    assert [item for item, _ in counter.most_common(3)] == ["a", "b", "c"]
+    for item, count, error in counter.most_common(3, errors=True):
+        assert count - error <= stream.count(item) <= count
+
+    first, second = SpaceSaving(capacity=50), SpaceSaving(capacity=50)
+    first.update(stream[:1500])
+    second.update(stream[1500:])
+    merged = first.merge(second)
+    assert merged.total == len(stream)
+    for item, count, error in merged.most_common(3, errors=True):
+        assert count - error <= stream.count(item) <= count
+
+    assert list(top(stream, n=3, approximate=True, capacity=50)) == ["a", "b", "c"]
+
+
+def test_compact_counter(tmp_path):
+    counter = CompactCounter(np.array(["a", "b", "a", "c", "a", "b"]))
+    counter.update(["d", "a"])
+    counter.update({"c": 2})
+    expected = Counter(["a", "b", "a", "c", "a", "b", "d", "a", "c", "c"])
+
+    assert len(counter) == 4
+    assert counter["a"] == 4 and counter["missing"] == 0
+    assert counter.most_common(2) == expected.most_common(2)
+    assert sort_dict_by_value(counter) == sort_dict_by_value(dict(expected))
+    assert percent_dict(counter) == percent_dict(dict(expected))
+    assert top_n_from_dict(counter, n=1) == {"a": 4}
+
+    counter.save(tmp_path / "counter.npz")
+    loaded = CompactCounter.load(tmp_path / "counter.npz")
+    assert dict(loaded.items()) == dict(expected)
+    assert dict(pickle.loads(pickle.dumps(counter)).items()) == dict(expected)
@@ -1,4 +1,16 @@
-from fns.decorators import batched
+import threading
+
+import numpy as np
+import pandas as pd
+
+from fns.decorators import (
+    batched,
+    named_timer,
+    StepProfiler,
+    timeit,
+    TimingRegistry,
+    timings,
+)
 
 
 def test_batched():
@@ -7,3 +19,109 @@ def test_batched():
         return [e * 2 for e in x]
 
     assert echo(range(16)) == [e * 2 for e in range(16)]
+
+
+@batched(4, workers=2, executor="process")
+def scale(x, factor=1):
+    return [e * factor for e in x]
+
+
+def test_batched_parallel():
+    @batched(3, workers=4)
+    def add(x, offset, square=False):
+        return [(e + offset) ** 2 if square else e + offset for e in x]
+
+    assert add(range(20), 1) == [e + 1 for e in range(20)]
+    assert add(range(20), 1, square=True) == [(e + 1) ** 2 for e in range(20)]
+    assert scale(range(10), factor=3) == [e * 3 for e in range(10)]
+
+
+def test_timing_registry():
+    registry = TimingRegistry()
+
+    @registry.timed()
+    def outer(n):
+        for _ in range(n):
+            with registry.span("inner"):
+                pass
+        return n
+
+    threads = [threading.Thread(target=outer, args=(100,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summary = registry.summary()
+    assert summary["count"].to_dict() == {"outer": 4, "outer/inner": 400}
+    inner = summary.loc["outer/inner"]
+    assert inner["p50"] <= inner["p99"] <= inner["max"]
+
+    registry.disable()
+    assert outer(3) == 3
+    assert registry.to_dict()["outer"]["count"] == 4
+
+
+def test_timeit_and_named_timer():
+    @timeit
+    def double(x):
+        return x * 2
+
+    @named_timer
+    def triple(x):
+        return x * 3
+
+    assert double(2) == 4
+    assert triple(2) == 6
+    assert "triple" in named_timer.times
+    assert timings.to_dict()["triple"]["count"] >= 1
+
+    count = timings.to_dict()["triple"]["count"]
+    timings.disable()
+    try:
+        triple(2)
+        double(2)
+    finally:
+        timings.enable()
+    assert timings.to_dict()["triple"]["count"] == count
+
+
+def test_step_profiler():
+    profiler = StepProfiler()
+
+    @profiler
+    def add_column(df, value):
+        return df.assign(text=[value * 1000] * len(df))
+
+    @profiler
+    def head(df):
+        return df.head(2)
+
+    df = pd.DataFrame({"a": range(100)})
+    df.pipe(add_column, "x").pipe(head)
+
+    report = profiler.report()
+    assert report["step"].tolist() == ["add_column", "head"]
+    assert report["columns_delta"].tolist() == [1, 0]
+    assert report["rows_delta"].tolist() == [0, -98]
+    assert report.loc[0, "memory_delta"] > 100 * 1000
+    assert report.loc[0, "peak_allocated"] > 0
+
+
+def test_step_profiler_nested():
+    profiler = StepProfiler()
+
+    @profiler
+    def small(df):
+        return df.copy()
+
+    @profiler
+    def large(df):
+        buffer = np.ones(2_000_000)
+        del buffer
+        return small(df)
+
+    large(pd.DataFrame({"a": range(10)}))
+    peaks = profiler.report().set_index("step")["peak_allocated"]
+    assert peaks["large"] >= 16_000_000
+    assert peaks["small"] < 1_000_000
@@ -0,0 +1,113 @@
+import time
+
+import numpy as np
+
+from fns.dedup import (
+    HashSet64,
+    LSHIndex,
+    MinHash,
+    dedupe_texts,
+    estimate_jaccard,
+    near_duplicates,
+    shingles,
+)
+from fns.metrics import jaccard
+from fns.preprocessing import remove_multiple_space
+
+
+def test_minhash():
+    a = "the quick brown fox jumps over the lazy dog"
+    b = "the quick brown fox jumps over the lazy cat"
+    minhash = MinHash(num_perm=256)
+    signatures = minhash.signatures([a, b])
+    assert signatures.shape == (2, 256)
+    expected = jaccard(shingles(a), shingles(b))
+    assert abs(estimate_jaccard(*signatures) - expected) < 0.1
+    assert np.array_equal(MinHash(num_perm=256).signature(a), signatures[0])
+
+
+def test_lsh_index(tmp_path):
+    texts = [
+        "the quick brown fox jumps over the lazy dog",
+        "completely unrelated sentence about spaceships",
+        "the quick brown fox jumps over the lazy dog!",
+        "another sentence about spaceships and planets",
+        "The quick brown fox jumps over the lazy dog!",
+    ]
+    assert near_duplicates(texts, threshold=0.7) == [[0, 2, 4]]
+
+    index = LSHIndex(threshold=0.7)
+    index.add_texts(texts[:3], keys=["a", "b", "c"])
+    index.add_texts(texts[3:], keys=["d", "e"])
+    assert index.query(texts[0]) == ["a", "c", "e"]
+
+    index.save(tmp_path / "index.npz")
+    loaded = LSHIndex.load(tmp_path / "index.npz")
+    assert len(loaded) == 5
+    assert loaded.clusters() == [["a", "c", "e"]]
+
+
+def test_dedupe_texts():
+    texts = ["a b", "c", "A  b", "c", "d", "a b", "e"]
+    assert list(dedupe_texts(iter(texts), batch_size=2)) == [
+        "a b",
+        "c",
+        "A  b",
+        "d",
+        "e",
+    ]
+    normalized = dedupe_texts(
+        texts, normalize=[str.lower, remove_multiple_space], batch_size=3
+    )
+    assert list(normalized) == ["a b", "c", "d", "e"]
+    assert list(dedupe_texts(texts, return_index=True))[-1] == (6, "e")
+
+
+def test_hash_set():
+    hashes = HashSet64()
+    for start in range(0, 1000, 100):
+        hashes.add(np.arange(start, start + 100, dtype=np.uint64))
+    assert len(hashes) == 1000
+    assert hashes.contains(np.array([0, 999, 1000], dtype=np.uint64)).tolist() == [
+        True,
+        True,
+        False,
+    ]
+
+
+def test_lsh_clusters_match_candidate_pairs():
+    rng = np.random.default_rng(0)
+    words = ["w%d" % i for i in range(6)]
+    texts = [" ".join(rng.choice(words, 6)) for _ in range(300)]
+    index = LSHIndex(threshold=0.5)
+    index.add_texts(texts)
+
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for i, text in enumerate(texts):
+        for j in index.query(text):
+            parent[find(j)] = find(i)
+    groups = {}
+    for i in range(len(texts)):
+        groups.setdefault(find(i), []).append(i)
+    expected = sorted(group for group in groups.values() if len(group) > 1)
+    assert sorted(index.clusters()) == expected
+
+
+def test_lsh_clusters_many_duplicates():
+    texts = ["RT win a free phone, click now"] * 5000 + [
+        "an unrelated sentence about spaceships",
+        "another sentence about planets and stars",
+    ]
+    index = LSHIndex(threshold=0.8)
+    index.add_texts(texts)
+    start = time.perf_counter()
+    clusters = index.clusters()
+    # Comparing every pair of the 5000 copies takes over a minute
+    assert time.perf_counter() - start < 10
+    assert clusters == [list(range(5000))]
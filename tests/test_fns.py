@@ -1,13 +1,59 @@
+import base64
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pytest
 from argparse import ArgumentParser, Namespace
 
-from fns import parse_manual, flatten, format_as_hms
-from fns.text import window
+import fns.fns as fns_module
+from fns import (
+    parse_manual,
+    flatten,
+    format_as_hms,
+    hash_file,
+    hash_directory,
+    iter_jsonl,
+    write_jsonl,
+    read_pickle,
+    write_pickle,
+    iter_files,
+    count_files,
+    num_files,
+    read_as_base64,
+    base64_dict,
+    iter_base64,
+    iter_base64_decode,
+    iter_base64_json,
+    ngrams,
+)
+from fns.text import window, offset_by_one, md5_hash
 
 
 def test_window():
     expected = [(["a", "b"], "c"), (["b", "c"], "d")]
     assert window(["a", "b", "c", "d"], size=2) == expected
 
+    windows, targets = window(np.arange(5), size=2)
+    assert windows.tolist() == [[0, 1], [1, 2], [2, 3]]
+    assert targets.tolist() == [2, 3, 4]
+    assert np.shares_memory(windows, targets)
+
+
+def test_ngrams():
+    assert ngrams([1, 2, 3], 2) == [[1, 2], [2, 3]]
+    assert list(ngrams([1, 2, 3], 2, lazy=True)) == [[1, 2], [2, 3]]
+    assert ngrams(np.arange(3), 2).tolist() == [[0, 1], [1, 2]]
+    assert ngrams(np.arange(1), 2).shape == (0, 2)
+
+
+def test_offset_by_one():
+    inputs, targets = offset_by_one(np.arange(1, 9), sequence_length=3)
+    expected = offset_by_one(list(range(1, 9)), sequence_length=3)
+    assert list(zip(inputs.tolist(), targets.tolist())) == expected
+
 
 def test_parse_manual():
     parser = ArgumentParser()
@@ -22,3 +68,148 @@ def test_flatten():
 
 def test_format_as_hms():
     assert format_as_hms(60 * 60 + 61) == "01:01:01"
+
+
+def test_hash_file(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(bytes(range(256)) * 10)
+    expected = hashlib.sha256(path.read_bytes()).hexdigest()
+    assert hash_file(path, algorithm="sha256", chunk_size=100) == expected
+    assert hash_file(path, algorithm="sha256", use_mmap=True) == expected
+    with open(path, "rb") as fp:
+        assert hash_file(fp, algorithm="sha256", chunk_size=7) == expected
+        assert fp.tell() == 0
+
+    text_path = tmp_path / "data.txt"
+    text_path.write_text("héllo world")
+    with open(text_path) as fp:
+        assert hash_file(fp) == md5_hash("héllo world")
+
+
+def test_hash_directory(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "x.txt").write_text("x")
+    (tmp_path / "y.txt").write_text("y")
+    hashes = hash_directory(tmp_path, workers=2)
+    assert hashes == {"a/x.txt": md5_hash("x"), "y.txt": md5_hash("y")}
+
+
+def test_jsonl(tmp_path):
+    records = [{"id": np.int64(i), "vector": np.arange(2) * i} for i in range(5)]
+    expected = [{"id": i, "vector": [0, i]} for i in range(5)]
+    for name in ["data.jsonl", "data.jsonl.gz", "data.jsonl.bz2"]:
+        path = tmp_path / name
+        assert write_jsonl(records, path, batch_size=2) == 5
+        assert list(iter_jsonl(path)) == expected
+        assert list(iter_jsonl(path, batch_size=2)) == [
+            expected[:2],
+            expected[2:4],
+            expected[4:],
+        ]
+
+
+def test_jsonl_backends(monkeypatch):
+    pytest.importorskip("orjson")
+    records = [
+        {1: np.float32(0.1), "text": "café", "vector": np.arange(3)},
+        {"missing": None, True: [1.5, 2]},
+        {"nan": float("nan"), "inf": np.float64("inf")},
+    ]
+    with_orjson = [fns_module._dumps_json(record) for record in records]
+    monkeypatch.setattr(fns_module, "orjson", None)
+    with_json = [fns_module._dumps_json(record) for record in records]
+    assert with_orjson == with_json
+    assert str(fns_module._loads_json(with_json[2])) == "{'nan': nan, 'inf': inf}"
+
+
+def test_pickle(tmp_path):
+    umask = os.umask(0)
+    os.umask(umask)
+    item = {"name": "features", "array": np.arange(1000, dtype=np.float32)}
+    for name in ["data.pkl", "data.pkl.gz"]:
+        path = tmp_path / name
+        write_pickle(item, path, atomic=True)
+        loaded = read_pickle(path)
+        assert loaded["name"] == "features"
+        assert np.array_equal(loaded["array"], item["array"])
+
+        write_pickle(item, path, out_of_band=True, atomic=True)
+        loaded = read_pickle(path)
+        assert np.array_equal(loaded["array"], item["array"])
+        assert not loaded["array"].flags.writeable
+        assert read_pickle(path, use_mmap=False)["array"].flags.writeable
+        assert path.stat().st_mode & 0o777 == 0o666 & ~umask
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "data.pkl",
+        "data.pkl.buffers",
+        "data.pkl.gz",
+        "data.pkl.gz.buffers",
+    ]
+
+
+def test_file_counting(tmp_path):
+    for name in ["a/1.txt", "a/b/2.TXT", "a/b/3.jpg", "4.txt"]:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("")
+    assert num_files(tmp_path) == 1
+    assert num_files(tmp_path, recursive=True) == 4
+    assert count_files(tmp_path, kind="dir") == 2
+    assert count_files(tmp_path, extensions=[".txt"], workers=2) == 3
+    assert count_files(tmp_path, pattern="*.jpg", workers=2) == 1
+    assert sorted(iter_files(tmp_path / "a", recursive=False, kind="all")) == [
+        str(tmp_path / "a" / "1.txt"),
+        str(tmp_path / "a" / "b"),
+    ]
+
+    # Links count as their target, links to directories are not descended into
+    (tmp_path / "link").symlink_to(tmp_path / "a", target_is_directory=True)
+    (tmp_path / "file_link").symlink_to(tmp_path / "4.txt")
+    assert num_files(tmp_path) == 2
+    assert num_files(tmp_path, recursive=True) == 5
+    assert count_files(tmp_path, kind="dir") == 3
+    assert sorted(hash_directory(tmp_path)) == [
+        "4.txt",
+        "a/1.txt",
+        "a/b/2.TXT",
+        "a/b/3.jpg",
+        "file_link",
+    ]
+
+
+def test_base64(tmp_path):
+    path = tmp_path / "data.bin"
+    data = bytes(range(256)) * 7
+    path.write_bytes(data)
+    expected = base64.b64encode(data)
+    assert read_as_base64(path) == expected.decode("ascii")
+    assert b"".join(iter_base64(path, chunk_size=10)) == expected
+    with open(path, "rb") as fp:
+        assert b"".join(iter_base64(fp, chunk_size=10)) == expected
+
+    wrapped = [expected[i : i + 7] + b"\n" for i in range(0, len(expected), 7)]
+    assert b"".join(iter_base64_decode(wrapped)) == data
+
+    payload = base64.b64encode(json.dumps({"a": [1, 2]}).encode("utf-8"))
+    assert base64_dict(payload.decode("ascii")) == {"a": [1, 2]}
+    assert base64_dict(io.BytesIO(payload)) == {"a": [1, 2]}
+
+
+def test_iter_base64_json(tmp_path):
+    pytest.importorskip("ijson")
+    records = [{"id": i, "text": "x" * i} for i in range(50)]
+    path = tmp_path / "records.json.b64"
+    path.write_bytes(base64.b64encode(json.dumps(records).encode("utf-8")))
+    assert list(iter_base64_json(path)) == records
+    encoded = path.read_bytes()
+    chunks = [encoded[i : i + 33] for i in range(0, len(encoded), 33)]
+    assert list(iter_base64_json(chunks, prefix="item.id")) == list(range(50))
+
+
+def test_pickle_mismatched_buffers(tmp_path):
+    path = tmp_path / "data.pkl"
+    write_pickle({"array": np.arange(10)}, path, out_of_band=True)
+    stale_index = path.read_bytes()
+    write_pickle({"array": np.arange(20)}, path, out_of_band=True)
+    path.write_bytes(stale_index)
+    with pytest.raises(ValueError):
+        read_pickle(path)
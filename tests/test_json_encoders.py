@@ -0,0 +1,25 @@
+import json
+
+import numpy as np
+import pytest
+
+from fns.json_encoders import read_json_sidecar, write_json_sidecar
+
+
+@pytest.mark.parametrize("sidecar", ["npy", "npz"])
+def test_write_json_sidecar(tmp_path, sidecar):
+    vectors = np.arange(20_000, dtype=np.float32).reshape(100, 200)
+    item = {"name": "model", "small": np.arange(3), "vectors": vectors.T}
+    path = tmp_path / "model.json"
+    write_json_sidecar(item, path, array_threshold=1024, sidecar=sidecar)
+
+    metadata = json.loads(path.read_text())
+    assert metadata["small"] == [0, 1, 2]
+    assert metadata["vectors"]["shape"] == [200, 100]
+
+    loaded = read_json_sidecar(path)
+    assert isinstance(loaded["vectors"], np.memmap)
+    np.testing.assert_array_equal(loaded["vectors"], vectors.T)
+    np.testing.assert_array_equal(
+        read_json_sidecar(path, mmap=False)["vectors"], vectors.T
+    )
@@ -1,4 +1,18 @@
+import itertools
+import json
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from fns.json_encoders import NpEncoder
 from fns.preprocessing import (
+    _fusable_steps,
+    normalize_json,
+    compose,
+    remove_multiple_space,
+    remove_punctuation,
+    TextPipeline,
     remove_retweet,
     remove_hashtag,
     remove_hyperlink,
@@ -26,3 +40,90 @@ def test_combine_hyphenated_word():
 
 def test_remove_multiple_commas():
     assert remove_multiple_commas("a,,b,c") == "a,b,c"
+
+
+def test_text_pipeline():
+    steps = [
+        remove_retweet,
+        remove_hyperlink,
+        remove_hashtag,
+        remove_punctuation,
+        remove_multiple_space,
+    ]
+    texts = pd.Series(["RT #cool   app! https://t.co/x", "a,,b  #c"], index=[3, 7])
+    expected = texts
+    for step in steps:
+        expected = expected.apply(step)
+
+    clean = compose(*steps)
+    assert len(clean.stages) == 3
+    pd.testing.assert_series_equal(clean.apply(texts), expected)
+    assert clean.apply(texts.tolist() * 2, batch_size=1, workers=2) == (
+        expected.tolist() * 2
+    )
+    assert clean.report().index.tolist() == [
+        "remove_retweet+remove_hyperlink",
+        "remove_hashtag+remove_punctuation",
+        "remove_multiple_space",
+    ]
+    assert len(TextPipeline(steps, fuse=False).stages) == len(steps)
+
+
+def test_normalize_json():
+    data = {
+        "nums": np.arange(6, dtype=np.float32).reshape(2, 3),
+        1: [np.int64(3), (True, None)],
+        2.5: {"nested": np.float64(0.5), "nan": float("nan")},
+    }
+    expected = json.loads(json.dumps(data, cls=NpEncoder))
+    assert json.dumps(normalize_json(data)) == json.dumps(expected)
+
+    @dataclass
+    class Point:
+        x: np.int32
+        tags: set
+
+    data = {
+        "point": Point(np.int32(1), {"a"}),
+        "when": pd.Series(pd.to_datetime(["2020-01-02"])),
+    }
+    assert normalize_json(data) == {
+        "point": {"x": 1, "tags": ["a"]},
+        "when": ["2020-01-02T00:00:00"],
+    }
+
+    data = {
+        "took": np.array([1500, "NaT"], dtype="timedelta64[ms]"),
+        "wait": pd.Series(pd.to_timedelta(["1min"])),
+        "delta": np.timedelta64(2, "ns"),
+        "at": np.datetime64("2020-01-02T03:04:05", "ns"),
+        "raw": np.array([b"ab", "é".encode()]),
+        "name": b"x",
+    }
+    native = normalize_json(data)
+    assert native == {
+        "took": [1.5, None],
+        "wait": [60.0],
+        "delta": 2e-09,
+        "at": "2020-01-02T03:04:05",
+        "raw": ["ab", "é"],
+        "name": "x",
+    }
+    json.dumps(native)
+
+
+def test_text_pipeline_fusion_matches_sequential():
+    texts = [
+        "see https://t.co/x now",
+        "#RT x",
+        "RT  #cool,,, app!!  https://a.b/c?d=1\nRT  more,,  text",
+        "https://x.y\nRT  y",
+        "a,, ,,b   #c-d",
+    ]
+    for steps in itertools.permutations(_fusable_steps):
+        expected = []
+        for text in texts:
+            for step in steps:
+                text = step(text)
+            expected.append(text)
+        assert compose(*steps).apply(texts) == expected, steps
@@ -0,0 +1,44 @@
+import random
+
+from fns import generate_edits
+from fns.spelling import SymSpell, edit_distance
+
+
+def test_edit_distance():
+    assert edit_distance("hte", "the") == 1
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("kitten", "sitting", max_distance=1) == 2
+
+
+def test_symspell(tmp_path):
+    vocabulary = {"hello": 10, "help": 5, "world": 8, "a": 1}
+    speller = SymSpell(max_distance=2).fit(vocabulary)
+    assert speller.lookup("helo", max_distance=1) == [("hello", 1, 10), ("help", 1, 5)]
+    assert speller.lookup("b", max_distance=1) == [("a", 1, 1)]
+    assert speller.correct(["helo", "wrld", "xyzzy"]) == ["hello", "world", "xyzzy"]
+
+    # Every word found by brute-force edits must also be found by the index
+    expected = {w for w in generate_edits("wrold", n=2) if w in vocabulary}
+    assert {w for w, _, _ in speller.lookup("wrold")} == expected
+
+    speller.save(tmp_path / "speller.pkl")
+    loaded = SymSpell.load(tmp_path / "speller.pkl")
+    assert loaded.lookup("helo") == speller.lookup("helo")
+
+
+def test_symspell_pruned_lookup():
+    rng = random.Random(0)
+    vocabulary = {
+        "".join(rng.choices("abcd", k=rng.randint(1, 8))): rng.randint(1, 50)
+        for _ in range(500)
+    }
+    speller = SymSpell(max_distance=2, prefix_length=5).fit(vocabulary)
+    for _ in range(200):
+        query = "".join(rng.choices("abcde", k=rng.randint(1, 9)))
+        everything = speller.lookup(query)
+        assert speller.lookup(query, n=1) == everything[:1]
+        assert speller.lookup(query, n=3) == everything[:3]
+        for word, distance, _ in everything:
+            assert edit_distance(query, word) == distance
+    assert edit_distance("abcdef", "abdcef", max_distance=1) == 1
+    assert edit_distance("prefix-x-suffix", "prefix-yy-suffix") == 2
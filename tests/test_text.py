@@ -1,5 +1,164 @@
-from fns.text import extract_abbreviations
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from fns.text import (
+    abbreviations_batch,
+    extract_abbreviations,
+    extract_discriminative_keywords,
+    extract_stopwords,
+    export_fasttext_format,
+    DocumentFrequency,
+    extract_tfidf_keywords,
+    is_non_ascii,
+    is_non_ascii_batch,
+    num_words,
+    num_words_batch,
+    PhraseMatcher,
+    span_positions,
+    unique_chars,
+    Vocabulary,
+)
 
 
 def test_abbreviations():
     assert extract_abbreviations(["HTTP was used"]) == ["HTTP"]
+
+
+def test_phrase_matcher():
+    phrases = ["new york", "york", "c++", "_id"]
+    matcher = pickle.loads(pickle.dumps(PhraseMatcher(phrases)))
+    texts = ["I love New York. newyork york", "use c++ or c++x", "my_id _id"]
+    assert matcher.find_all(texts) == [span_positions(t, phrases) for t in texts]
+    assert span_positions("NEW YORK", matcher) == [(0, 8)]
+    assert PhraseMatcher(phrases, ignore_case=False).find("New York york") == [(9, 13)]
+    assert PhraseMatcher(["york"], word_boundary=False).find("newyork") == [(3, 7)]
+    matcher = PhraseMatcher(["İstanbul"])
+    assert matcher.find("I went to İstanbul") == [(10, 18)]
+    assert span_positions("I went to İstanbul", ["İstanbul"]) == [(10, 18)]
+
+
+def test_extract_tfidf_keywords():
+    texts = [
+        "the cat sat on the mat",
+        "dogs chase cats",
+        "cat and dog friends",
+        "brown dog barks at the cat",
+        "the",
+    ]
+    keywords = extract_tfidf_keywords(texts, n=3)
+    assert keywords == ["cat", "dog", "dog friends"]
+    chunks = [texts[:2], texts[2:4], texts[4:]]
+    assert extract_tfidf_keywords(chunks, n=3, streaming=True) == keywords
+    assert extract_tfidf_keywords(lambda: iter(chunks), n=3, streaming=True) == keywords
+    with pytest.raises(TypeError):
+        extract_tfidf_keywords(iter(chunks), streaming=True)
+
+
+def test_extract_discriminative_keywords():
+    df = pd.DataFrame(
+        {
+            "category": ["pets", "pets", "food", "food"],
+            "text": ["cat dog", "dog leash", "pizza pasta", "pizza salad"],
+        }
+    )
+    vectorizer = TfidfVectorizer()
+    keywords = extract_discriminative_keywords(
+        df, "category", "text", n=3, vectorizer=vectorizer
+    )
+    assert keywords["pets"].tolist() == ["dog", "cat", "leash"]
+    assert keywords["food"].tolist()[0] == "pizza"
+    vocabulary = vectorizer.vocabulary_
+    repeated = extract_discriminative_keywords(
+        df, "category", "text", n=5, vectorizer=vectorizer
+    )
+    assert vectorizer.vocabulary_ is vocabulary
+    assert repeated["pets"].tolist()[3:] == [None, None]
+
+
+def test_document_frequency():
+    texts = ["the cat sat", "the dog", "a cat and the dog", "dogs bark"]
+    vectorizer = TfidfVectorizer().fit(texts)
+    expected = pd.DataFrame(
+        zip(vectorizer.get_feature_names_out(), vectorizer.idf_),
+        columns=["word", "idf"],
+    ).sort_values(by="idf")
+    assert extract_stopwords(texts).equals(expected)
+
+    merged = DocumentFrequency().partial_fit(texts[:2])
+    merged.merge(DocumentFrequency().partial_fit(texts[2:]))
+    assert merged.idf().equals(expected)
+    assert merged.stopwords(top_n=1) == ["the"]
+    assert merged.stopwords(threshold=0.5) == ["the", "cat", "dog"]
+
+
+def test_export_fasttext_format(tmp_path):
+    path = tmp_path / "train.txt"
+    assert export_fasttext_format(["good", "bad"], ["pos", ["neg", "x"]], path) == [
+        str(path)
+    ]
+    assert path.read_text() == "__label__pos good\n__label__neg __label__x bad\n"
+
+    texts = (f"text {i}" for i in range(100))
+    labels = (str(i % 2) for i in range(100))
+    paths = export_fasttext_format(
+        texts,
+        labels,
+        path,
+        shards=2,
+        validation_split=0.2,
+        shuffle=True,
+        seed=0,
+        preprocess=str.upper,
+        batch_size=7,
+        shuffle_buckets=4,
+    )
+    assert [Path(p).name for p in paths] == [
+        "train.0.txt",
+        "train.1.txt",
+        "train.valid.txt",
+    ]
+    lines = [line for p in paths for line in Path(p).read_text().splitlines()]
+    assert sorted(lines) == sorted(f"__label__{i % 2} TEXT {i}" for i in range(100))
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "train.0.txt",
+        "train.1.txt",
+        "train.txt",
+        "train.valid.txt",
+    ]
+
+
+def test_vocabulary(tmp_path):
+    texts = ["the cat sat", "the dog sat", "a bird"]
+    vocab = Vocabulary(min_count=2).fit(iter(texts))
+    assert vocab.itos == ["<pad>", "<unk>", "sat", "the"]
+    vocab.update(["a cat"]).build()
+    assert vocab.itos == ["<pad>", "<unk>", "a", "cat", "sat", "the"]
+
+    ids, offsets = vocab.encode(["the bird sat", ""])
+    assert ids.dtype == np.int32 and offsets.tolist() == [0, 3, 3]
+    assert vocab.decode(ids, offsets) == ["the <unk> sat", ""]
+
+    vocab.save(tmp_path / "vocab.npz")
+    loaded = Vocabulary.load(tmp_path / "vocab.npz")
+    assert loaded.itos == vocab.itos and loaded.unk_token == "<unk>"
+
+    chars = Vocabulary(level="char", max_size=2, specials=(), unk_token=None)
+    chars.fit(["aab", "abc"])
+    assert chars.decode(*chars.encode(["abcd"])) == ["ab"]
+    assert unique_chars(["ab", "bc"]) == ["a", "b", "c"]
+
+
+def test_text_stats_batch():
+    texts = pd.Series(["Hello WWW and HTTP", "naïve café", "", "  a  b "])
+    np.testing.assert_array_equal(num_words_batch(texts), texts.apply(num_words))
+    np.testing.assert_array_equal(is_non_ascii_batch(texts), texts.apply(is_non_ascii))
+    assert abbreviations_batch(texts).tolist() == [{"WWW", "HTTP"}, set(), set(), set()]
+    np.testing.assert_array_equal(
+        num_words_batch(texts.tolist() * 3, workers=2, chunk_size=5),
+        np.tile(texts.apply(num_words).to_numpy(), 3),
+    )